@@ -1,66 +1,169 @@
 import argparse
 import logging
 import os
+import sys
 from distutils.util import strtobool
 from pathlib import Path
+from typing import Callable, Optional, Sequence
 
-import asn1tools as asn1
-import coloredlogs
-from rflx.model.model import Model
-
+from asn2rflx import bench, corpus, distributed
+from asn2rflx.bundle import BUNDLE_NAME, Bundle, write_bundle
 from asn2rflx.convert import AsnTypeConverter
-from asn2rflx.prelude import prelude_model
+from asn2rflx.distributed import Coordinator, JobQueue
+from asn2rflx.output import write_specification_files
+from asn2rflx.proof import ProofFallback
+from asn2rflx.session import Session
+from asn2rflx.utils import init_logging
 
 SKIP_PROOF: bool = bool(strtobool(os.environ.get("ASN2RFLX_SKIP_PROOF", "true")))
 
+SUBCOMMANDS: dict[str, Callable[[Optional[Sequence[str]]], None]] = {
+    "bench": bench.main,
+    "corpus": corpus.main,
+    "worker": distributed.main,
+}
+
 
 def main() -> None:
-    parser = argparse.ArgumentParser()
+    args = sys.argv[1:]
+    if args and args[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[args[0]](args[1:])
+
+    parser = argparse.ArgumentParser(
+        epilog=f"other subcommands: {', '.join(SUBCOMMANDS)}"
+    )
     parser.add_argument(
         "-o", "--outputdir", default=".", help="the output directory of .rflx files"
     )
     parser.add_argument(
         "-v", "--verbosity", action="count", help="the logging verbosity"
     )
+    parser.add_argument(
+        "-r",
+        "--root",
+        action="append",
+        metavar="TYPE",
+        help="only convert the types reachable from TYPE (can be repeated)",
+    )
+    parser.add_argument(
+        "--proof-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="the maximum time allowed for the proof of each type",
+    )
+    parser.add_argument(
+        "--on-proof-timeout",
+        choices=[f.value for f in ProofFallback],
+        default=ProofFallback.SKIP.value,
+        help="whether to skip the proof of a type or to fail when it has timed out",
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="DIR",
+        help="distribute the proofs to the `asn2rflx worker`s of the job queue DIR",
+    )
+    parser.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="the time after which a proof job of a silent worker is given to another",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="fail when the proofs given to the queue have not finished after SECONDS",
+    )
+    parser.add_argument(
+        "--full-validation",
+        action="store_true",
+        help="run all the checks of RecordFlux on the resulting model",
+    )
+    parser.add_argument(
+        "-b",
+        "--binary",
+        action="store_true",
+        help=f"also write the model to a binary `{BUNDLE_NAME}` in the output dir",
+    )
+    parser.add_argument(
+        "-g",
+        "--generate",
+        metavar="DIR",
+        help="also generate SPARK code from the converted model into DIR",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="the number of parsing and code generation processes"
+        " (defaults to the number of CPUs)",
+    )
     parser.add_argument(
         "FILE", nargs="+", help="the .asn specification(s) to be converted"
     )
-    opts = parser.parse_args()
+    opts = parser.parse_args(args)
 
-    verbosity = {
-        1: logging.ERROR,
-        2: logging.WARNING,
-        3: logging.INFO,
-        4: logging.DEBUG,
-    }.get(opts.verbosity, logging.INFO)
-    logging.basicConfig(level=verbosity)
-    coloredlogs.install()
+    init_logging(opts.verbosity)
 
     outputdir = Path(opts.outputdir)
     outputdir.mkdir(parents=True, exist_ok=True)
     logging.info(f".rflx specs will be written to `{outputdir.absolute()}`...")
 
+    converter = AsnTypeConverter(
+        skip_proof=SKIP_PROOF,
+        proof_timeout=opts.proof_timeout,
+        on_proof_timeout=ProofFallback(opts.on_proof_timeout),
+    )
+    coordinator = (
+        Coordinator(
+            JobQueue(Path(opts.queue)),
+            converter,
+            opts.lease_timeout,
+            deadline=opts.deadline,
+        )
+        if opts.queue
+        else None
+    )
+    session = Session(converter, coordinator, opts.jobs)
+
     logging.info("Compiling .asn specs...")
-    spec = asn1.compile_files(opts.FILE)
+    session.compile_files(opts.FILE)
 
     logging.info(
         f"Converting .asn specs with proofs {'OFF' if SKIP_PROOF else 'ON'}..."
     )
-    model = Model(
-        types=[
-            # TODO: Should we include all the prelude types in the resulting
-            # Model? It's nice for writing, but not necessary for reading and
-            # is costing us much time on message proving.
-            *prelude_model(skip_proof=SKIP_PROOF).types,
-            *AsnTypeConverter(skip_proof=SKIP_PROOF).convert_spec(spec).values(),
-        ]
+    # TODO: Should we include all the prelude types in the resulting
+    # Model? It's nice for writing, but not necessary for reading and
+    # is costing us much time on message proving.
+    model = session.assemble(
+        session.convert_files(opts.FILE, roots=opts.root).values(),
+        full_validation=opts.full_validation,
     )
+    if unproven := session.converter.unproven:
+        logging.warning(f"Proofs skipped for: {', '.join(sorted(unproven))}")
 
     logging.info(f"Writing .rflx specs to `{outputdir.absolute()}`...")
-    model.write_specification_files(outputdir)
+    written = write_specification_files(model, outputdir)
+    logging.info(f"{len(written)} .rflx spec(s) written, the others are unchanged")
+
+    if opts.binary:
+        graph = converter.convert_reachable(session.compile_files(opts.FILE), opts.root)
+        path = write_bundle(Bundle.create(model, graph), outputdir)
+        logging.info(f"Binary model {'written' if path else 'unchanged'}")
 
     logging.info("Writing specs done!")
 
+    if opts.generate:
+        # Imported lazily, since the code generator is quite heavy to load.
+        from asn2rflx.generate import generate
+
+        generatedir = Path(opts.generate)
+        generatedir.mkdir(parents=True, exist_ok=True)
+        logging.info(f"Generating SPARK code to `{generatedir.absolute()}`...")
+        generate(model, generatedir, jobs=opts.jobs)
+        logging.info("Generating code done!")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,72 @@
+from typing import Iterable, Sequence
+
+from rflx.error import RecordFluxError, Severity, Subsystem
+from rflx.identifier import ID
+from rflx.model import Enumeration, Model, Type
+from rflx.model.session import Session
+
+
+class AssembledModel(Model):
+    """
+    A `Model` whose types are taken as they are, without the whole-model checks
+    of `Model.__init__`.
+
+    The types must already be closed under dependencies (with each type after its
+    dependencies) and free of conflicts, e.g. by having been built by `assemble`.
+    """
+
+    def __init__(
+        self, types: Sequence[Type] = (), sessions: Sequence[Session] = ()
+    ) -> None:
+        # `Model.__init__` is skipped on purpose.
+        # pylint: disable = super-init-not-called
+        self._types = [*types]
+        self._sessions = [*sessions]
+
+
+def assemble(base: Model, types: Iterable[Type]) -> Model:
+    """
+    Adds `types` and their missing dependencies to the (already validated) `base`
+    model, like `Model(types=[*base.types, *types])` would.
+
+    Each type is only visited once, and the only whole-model check that is
+    performed is the detection of name conflicts, since the converted types never
+    introduce any enumeration (otherwise, the whole model is validated instead).
+    """
+    known: dict[ID, Type] = {t.identifier: t for t in base.types}
+    res = [*base.types]
+    error = RecordFluxError()
+
+    def add(ty: Type) -> None:
+        prev = known.get(ty.identifier)
+        if prev is not None:
+            if prev is not ty and prev != ty:
+                error.extend(
+                    [
+                        (
+                            f'name conflict for type "{ty.identifier}"',
+                            Subsystem.MODEL,
+                            Severity.ERROR,
+                            ty.location,
+                        ),
+                        (
+                            f'previous occurrence of "{ty.identifier}"',
+                            Subsystem.MODEL,
+                            Severity.INFO,
+                            prev.location,
+                        ),
+                    ]
+                )
+            return
+        known[ty.identifier] = ty
+        for dep in ty.direct_dependencies:
+            if dep is not ty:
+                add(dep)
+        res.append(ty)
+
+    for ty in types:
+        add(ty)
+    error.propagate()
+    if any(isinstance(t, Enumeration) for t in res[len(base.types) :]):
+        return Model(res, base.sessions)
+    return AssembledModel(res, base.sessions)
@@ -0,0 +1,282 @@
+"""
+Decode-throughput benchmark of the converted types (`asn2rflx bench`).
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from enum import Enum, unique
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+import asn1tools as asn1
+from rflx import model
+
+from asn2rflx import prelude
+from asn2rflx.corpus import AsnValueGenerator
+from asn2rflx.error import Asn2RflxError
+from asn2rflx.session import Session
+from asn2rflx.stream import pyrflx_validator
+from asn2rflx.utils import init_logging
+
+Parser = Callable[[bytes], Any]
+
+EMISSION: str = "merged"
+"""
+The way the converted types are emitted, i.e. as single messages with their nested
+types flattened by `merged()`. It is the only one for now.
+"""
+
+SYNTHETIC_SPECS: dict[str, str] = {
+    "Synthetic-Flat": """
+Synthetic-Flat DEFINITIONS ::= BEGIN
+    Flat ::= SEQUENCE { a INTEGER, b INTEGER, c OCTET STRING, d BOOLEAN }
+END
+""",
+    "Synthetic-Choice": """
+Synthetic-Choice DEFINITIONS ::= BEGIN
+    Choice ::= CHOICE { a INTEGER, b OCTET STRING, c BOOLEAN }
+    NestedChoice ::= CHOICE {
+        a CHOICE { a1 INTEGER, a2 OCTET STRING },
+        b CHOICE { b1 BOOLEAN, b2 NULL }
+    }
+END
+""",
+    "Synthetic-Sequence-Of": """
+Synthetic-Sequence-Of DEFINITIONS ::= BEGIN
+    Integers ::= SEQUENCE OF INTEGER
+    Pairs ::= SEQUENCE OF SEQUENCE { a INTEGER, b INTEGER }
+END
+""",
+    "Synthetic-Tagged": """
+Synthetic-Tagged DEFINITIONS ::= BEGIN
+    Implicit ::= SEQUENCE { a [0] IMPLICIT INTEGER, b [1] IMPLICIT OCTET STRING }
+    Explicit ::= SEQUENCE { a [0] EXPLICIT INTEGER, b [1] EXPLICIT OCTET STRING }
+END
+""",
+}
+"""Small specifications exercising each construct on its own."""
+
+
+@unique
+class Construct(Enum):
+    """The ASN.1 constructs whose parse cost is reported."""
+
+    CHOICE = "CHOICE"
+    NESTED_CHOICE = "nested CHOICE"
+    SEQUENCE_OF = "SEQUENCE OF"
+    EXPLICIT_TAG = "explicit tag"
+    IMPLICIT_TAG = "implicit tag"
+
+
+def constructs(ty: prelude.BerType) -> set[Construct]:
+    """The constructs used by `ty` and its dependencies."""
+    res: set[Construct] = set()
+    for t in prelude.postorder([ty]):
+        if isinstance(t, prelude.ChoiceBerType):
+            res.add(Construct.CHOICE)
+            if any(isinstance(v, prelude.ChoiceBerType) for v in t.variants.values()):
+                res.add(Construct.NESTED_CHOICE)
+        elif isinstance(t, prelude.SequenceOfBerType):
+            res.add(Construct.SEQUENCE_OF)
+        elif isinstance(t, prelude.ImplicitlyTaggedBerType):
+            if isinstance(t.base, prelude.ExplicitBerType):
+                res.add(Construct.EXPLICIT_TAG)
+            elif t.tag.class_ != prelude.AsnTagClass.UNIVERSAL:
+                res.add(Construct.IMPLICIT_TAG)
+    return res
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    """The parse throughput of a type."""
+
+    name: str
+    """The qualified ASN.1 name of the type."""
+
+    emission: str
+
+    constructs: list[str]
+
+    messages: int
+    """The number of messages parsed."""
+
+    bytes: int
+    """The number of bytes parsed."""
+
+    seconds: float
+
+    @property
+    def messages_per_s(self) -> float:
+        return self.messages / self.seconds
+
+    @property
+    def bytes_per_s(self) -> float:
+        return self.bytes / self.seconds
+
+
+def measure(
+    parse: Parser, messages: Sequence[bytes], min_time: float
+) -> tuple[int, int, float]:
+    """
+    Parses `messages` repeatedly for at least `min_time` seconds, returning the
+    number of messages and bytes parsed and the time it took.
+    """
+    count, size = 0, 0
+    start = time.perf_counter()
+    while True:
+        for data in messages:
+            parse(data)
+        count += len(messages)
+        size += sum(map(len, messages))
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return count, size, elapsed
+
+
+def parsers(
+    parser: str, spec: asn1.compiler.Specification, rflx_model: model.Model
+) -> Callable[[str, prelude.BerType], Parser]:
+    """
+    Returns a function making the parser of a converted type, which is either that
+    of PyRFLX, or that of `asn1tools` as a baseline.
+    """
+    if parser == "pyrflx":
+        return lambda _, ty: pyrflx_validator(rflx_model, ty.full_ident)
+    if parser == "asn1tools":
+
+        def make(name: str, _: prelude.BerType) -> Parser:
+            module, ty_name = name.rsplit(".", 1)
+            return spec.modules[module][ty_name].decode
+
+        return make
+    raise Asn2RflxError(f"unknown parser `{parser}`")
+
+
+def bench_spec(
+    session: Session,
+    spec: asn1.compiler.Specification,
+    count: int,
+    parser: str = "pyrflx",
+    min_time: float = 1.0,
+    seed: int = 0,
+) -> list[BenchResult]:
+    """Benchmarks the parsing of each type of `spec`, on `count` random messages."""
+    graph = session.converter.convert_reachable(spec)
+    types = session.converter.convert_spec(spec)
+    make_parser = parsers(parser, spec, session.assemble(types.values()))
+    res: list[BenchResult] = []
+    for name, ber_ty in graph.items():
+        module, ty_name = name.rsplit(".", 1)
+        gen = AsnValueGenerator(random.Random(f"{seed}:{name}"))
+        try:
+            messages = gen.messages(spec.modules[module][ty_name])
+            samples = [next(messages) for _ in range(count)]
+        except Asn2RflxError as e:
+            logging.warning(f"Skipping `{name}`: {e}")
+            continue
+        n, size, seconds = measure(make_parser(name, ber_ty), samples, min_time)
+        result = BenchResult(
+            name,
+            EMISSION,
+            sorted(c.value for c in constructs(ber_ty)),
+            n,
+            size,
+            seconds,
+        )
+        logging.info(
+            f"`{name}`: {result.messages_per_s:.0f} msg/s,"
+            f" {result.bytes_per_s / 1e3:.1f} kB/s"
+        )
+        res.append(result)
+    return res
+
+
+def breakdown(results: Sequence[BenchResult]) -> dict[str, tuple[float, float]]:
+    """
+    Returns, for each construct, the mean parse time per byte (in nanoseconds) of
+    the types using it, and of those that do not.
+    """
+
+    def mean_ns_per_byte(rs: list[BenchResult]) -> float:
+        return sum(r.seconds / r.bytes for r in rs) / len(rs) * 1e9 if rs else 0.0
+
+    return {
+        c.value: (
+            mean_ns_per_byte([r for r in results if c.value in r.constructs]),
+            mean_ns_per_byte([r for r in results if c.value not in r.constructs]),
+        )
+        for c in Construct
+    }
+
+
+def main(args: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="asn2rflx bench",
+        description="Benchmarks the parsing of the converted types.",
+    )
+    parser.add_argument(
+        "-v", "--verbosity", action="count", help="the logging verbosity"
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=100,
+        help="the number of distinct messages to parse for each type",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="the minimum time spent parsing the messages of each type",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=["pyrflx", "asn1tools"],
+        default="pyrflx",
+        help="the parser to benchmark (`asn1tools` being a baseline)",
+    )
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="also benchmark synthetic specs exercising each construct",
+    )
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    parser.add_argument(
+        "FILE", nargs="*", help="the .asn specification(s) to be benchmarked"
+    )
+    opts = parser.parse_args(args)
+
+    init_logging(opts.verbosity)
+
+    session = Session()
+    specs = [session.compile_files(opts.FILE)] if opts.FILE else []
+    if opts.synthetic:
+        specs += [session.compile_text(text) for text in SYNTHETIC_SPECS.values()]
+    if not specs:
+        parser.error("no specification to benchmark")
+
+    results = [
+        r
+        for spec in specs
+        for r in bench_spec(session, spec, opts.count, opts.parser, opts.min_time)
+    ]
+    logging.info(f"{'type':<40} {'msg/s':>10} {'kB/s':>10}  constructs")
+    for r in results:
+        logging.info(
+            f"{r.name:<40} {r.messages_per_s:>10.0f} {r.bytes_per_s / 1e3:>10.1f}"
+            f"  {', '.join(r.constructs)}"
+        )
+    logging.info(f"{'construct':<40} {'ns/B with':>10} {'without':>10}")
+    for construct, (with_, without) in breakdown(results).items():
+        logging.info(f"{construct:<40} {with_:>10.1f} {without:>10.1f}")
+
+    if opts.json:
+        Path(opts.json).write_text(
+            json.dumps([asdict(r) for r in results], indent=2) + "\n"
+        )
@@ -0,0 +1,170 @@
+"""
+A binary serialization of the converted model, loadable by downstream tools without
+parsing and checking the `.rflx` specifications again.
+
+The bundles are pickled, so they must only be loaded from trusted sources.
+"""
+
+import pickle
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import rflx
+from rflx.identifier import ID
+from rflx.model import Message, Model, Type
+
+from asn2rflx import prelude
+from asn2rflx.assemble import AssembledModel
+from asn2rflx.error import Asn2RflxError
+from asn2rflx.output import write_if_changed
+
+BUNDLE_NAME: str = "asn2rflx.bundle"
+"""The file name of the bundle written next to the `.rflx` specifications."""
+
+MAGIC: bytes = b"ASN2RFLX"
+
+FORMAT_VERSION: int = 1
+"""The version of the bundle format, to be bumped on each incompatible change."""
+
+_HEADER = struct.Struct(">8sHB")
+"""The magic, the format version and the length of the RecordFlux version."""
+
+
+@dataclass(frozen=True)
+class TypeInfo:
+    """The precomputed layout of a converted ASN.1 type."""
+
+    name: str
+    """The qualified ASN.1 name of the type, e.g. `RFC1157-SNMP.Message`."""
+
+    identifier: ID
+    """The identifier of the corresponding RecordFlux type."""
+
+    tag: Optional[int]
+    """The (short) tag of the type, or `None` for a `CHOICE`."""
+
+    choices: dict[str, dict[int, str]]
+    """
+    The flattened variant names by tag (see `ChoiceBerType.flat_variants`) of the
+    `CHOICE`s of the message, by prefix of their fields (`""` for a `CHOICE` type).
+    """
+
+    fields: list[str]
+    """The (flattened) fields of the RecordFlux message."""
+
+
+@dataclass(frozen=True)
+class Bundle:
+    """A converted model, with the `BerType` graph it has been converted from."""
+
+    types: list[Type]
+    """The types of the model, each one after its dependencies."""
+
+    graph: dict[str, prelude.BerType]
+    """The `BerType`s by qualified ASN.1 name."""
+
+    info: dict[str, TypeInfo]
+    """The layouts of the types of `graph`."""
+
+    @property
+    def model(self) -> Model:
+        """The model of this bundle, which is not checked again."""
+        return AssembledModel(self.types)
+
+    @staticmethod
+    def create(model: Model, graph: dict[str, prelude.BerType]) -> "Bundle":
+        tys = {t.identifier: t for t in model.types}
+        info: dict[str, TypeInfo] = {}
+        for name, ber_ty in graph.items():
+            ty = tys.get(ber_ty.full_ident)
+            if ty is None:
+                raise Asn2RflxError(f"type `{name}` is missing from the model")
+            tag = (
+                None
+                if isinstance(ber_ty, prelude.ChoiceBerType)
+                else ber_ty.tag.as_bytearray[0]
+            )
+            fields = [f.name for f in ty.fields] if isinstance(ty, Message) else []
+            info[name] = TypeInfo(name, ty.identifier, tag, _choices(ber_ty), fields)
+        return Bundle([*model.types], graph, info)
+
+    def dumps(self) -> bytes:
+        version = rflx.__version__.encode()
+        return (
+            _HEADER.pack(MAGIC, FORMAT_VERSION, len(version))
+            + version
+            + pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+
+    @staticmethod
+    def loads(data: bytes) -> "Bundle":
+        """
+        Loads a bundle, checking that it has been written with the same format and
+        the same version of RecordFlux.
+        """
+        try:
+            magic, version, rflx_len = _HEADER.unpack_from(data)
+        except struct.error as e:
+            raise Asn2RflxError("truncated bundle") from e
+        if magic != MAGIC:
+            raise Asn2RflxError("not an asn2rflx bundle")
+        if version != FORMAT_VERSION:
+            raise Asn2RflxError(
+                f"unsupported bundle format version {version}"
+                f" (expected {FORMAT_VERSION})"
+            )
+        start = _HEADER.size + rflx_len
+        rflx_version = data[_HEADER.size : start].decode()
+        if rflx_version != rflx.__version__:
+            raise Asn2RflxError(
+                f"bundle written with RecordFlux {rflx_version}"
+                f" (expected {rflx.__version__})"
+            )
+        res = pickle.loads(data[start:])
+        if not isinstance(res, Bundle):
+            raise Asn2RflxError("invalid bundle content")
+        return res
+
+
+def _choices(ty: prelude.BerType) -> dict[str, dict[int, str]]:
+    # Follows the flattening of the fields done by `merged()` in `BerType.tlv_ty`.
+    res: dict[str, dict[int, str]] = {}
+
+    def tlv(ty: prelude.BerType, prefix: str) -> None:
+        if isinstance(ty, prelude.ChoiceBerType):
+            choice(ty, prefix)
+        else:
+            lv(ty, f"{prefix}Untagged_")
+
+    def choice(ty: prelude.ChoiceBerType, prefix: str) -> None:
+        variants = ty.flat_variants
+        res[prefix] = {t.tag.as_bytearray[0]: f for f, t in variants.items()}
+        for f, t in variants.items():
+            lv(t, f"{prefix}{f}_")
+
+    def lv(ty: prelude.BerType, prefix: str) -> None:
+        if isinstance(ty, prelude.ImplicitlyTaggedBerType):
+            lv(ty.base, prefix)
+        elif isinstance(ty, prelude.SequenceBerType):
+            for f, t in ty.fields.items():
+                tlv(t, f"{prefix}Value_{f}_")
+        elif isinstance(ty, prelude.ChoiceBerType):
+            choice(ty, f"{prefix}Value_")
+
+    tlv(ty, "")
+    return res
+
+
+def write_bundle(bundle: Bundle, output_dir: Path) -> Optional[Path]:
+    """
+    Writes `bundle` to `output_dir`, unless it is unchanged.
+    Returns the path of the bundle if it has been written.
+    """
+    path = output_dir / BUNDLE_NAME
+    return path if write_if_changed(path, bundle.dumps()) else None
+
+
+def read_bundle(path: Path) -> Bundle:
+    return Bundle.loads(path.read_bytes())
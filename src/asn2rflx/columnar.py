@@ -0,0 +1,270 @@
+"""
+Columnar bulk extraction of the fields of many BER messages into NumPy arrays.
+
+This module requires the `columnar` extra (i.e. NumPy).
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, Sequence, cast
+
+import numpy as np
+from rflx import model
+
+from asn2rflx import prelude
+from asn2rflx.error import Asn2RflxError
+
+Reader = Callable[[bytes, int, int, int], int]
+"""
+A reader of a part of a BER message.
+
+It is called with `(data, pos, end, row)`, where `data[pos:end]` is the remaining
+input and `row` is the index of the message being read, and returns the position
+right after the part it has read.
+"""
+
+
+@dataclass(frozen=True)
+class Column:
+    """The values of a field extracted from many messages."""
+
+    present: np.ndarray
+    """Whether the field is present in each message (e.g. in a `CHOICE` variant)."""
+
+    values: Optional[np.ndarray] = None
+    """The values of a scalar field (e.g. `Tag_Num`, `Untagged_Length`)."""
+
+    offsets: Optional[np.ndarray] = None
+    """The offsets in the source buffer of a variable-length field, or -1."""
+
+    lengths: Optional[np.ndarray] = None
+    """The lengths in bytes of a variable-length field."""
+
+
+def field_paths(ty: prelude.BerType) -> list[str]:
+    """
+    Returns the paths of the fields of the `tlv_ty` of `ty` that can be extracted,
+    i.e. the flattened field names produced by `merged()`.
+    """
+    return list(_Walker(ty, paths=None).all_paths)
+
+
+def messages(buffer: bytes) -> Iterator[tuple[int, int]]:
+    """Yields the `(start, end)` offsets of the concatenated TLVs in `buffer`."""
+    pos = 0
+    while pos < len(buffer):
+        if len(buffer) - pos < 2:
+            raise Asn2RflxError(f"truncated message at offset {pos}")
+        end = pos + 2 + buffer[pos + 1]
+        if buffer[pos + 1] > cast(int, prelude.ASN_LENGTH_TY.last.value):
+            raise Asn2RflxError(f"unsupported long length at offset {pos}")
+        if end > len(buffer):
+            raise Asn2RflxError(f"truncated message at offset {pos}")
+        yield pos, end
+        pos = end
+
+
+def extract(
+    ty: prelude.BerType, buffer: bytes, paths: Sequence[str]
+) -> dict[str, Column]:
+    """
+    Extracts the fields at the given `paths` (see `field_paths`) out of the
+    concatenated BER messages of type `ty` in `buffer`.
+
+    Only the parts of the messages needed to locate the selected fields are read.
+    The other ones are skipped without being validated.
+    """
+    bounds = np.array(list(messages(buffer)), dtype=np.int64).reshape(-1, 2)
+    walker = _Walker(ty, paths=set(paths), rows=len(bounds))
+    unknown = set(paths) - set(walker.all_paths)
+    if unknown:
+        raise Asn2RflxError(f"unknown field paths: {sorted(unknown)}")
+    for row, (start, end) in enumerate(bounds.tolist()):
+        try:
+            walker.reader(buffer, start, end, row)
+        except IndexError as e:
+            raise Asn2RflxError(f"truncated message #{row} at offset {start}") from e
+    return {p: walker.columns[p] for p in paths}
+
+
+def integers(buffer: bytes, column: Column) -> np.ndarray:
+    """
+    Decodes the BER `INTEGER` contents of a variable-length `column` extracted
+    from `buffer` to signed 64-bit integers (0 where the field is absent).
+    """
+    if column.offsets is None or column.lengths is None:
+        raise Asn2RflxError("cannot decode integers out of a scalar column")
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    lengths = np.where(column.present, column.lengths, 0)
+    if len(lengths) and lengths.max() > 8:
+        raise Asn2RflxError("cannot decode integers larger than 64 bits")
+    acc = np.zeros(len(lengths), dtype=np.uint64)
+    for i in range(int(lengths.max()) if len(lengths) else 0):
+        mask = lengths > i
+        byte = data[column.offsets[mask] + i].astype(np.uint64)
+        acc[mask] = (acc[mask] << np.uint64(8)) | byte
+    # Sign-extend each value from its actual length to 64 bits.
+    shift = np.where(lengths > 0, 64 - 8 * lengths, 0)
+    return (acc << shift.astype(np.uint64)).view(np.int64) >> shift
+
+
+class _Walker:
+    """Builds the `Reader` of a `BerType` and the columns it writes to."""
+
+    def __init__(
+        self, ty: prelude.BerType, paths: Optional[set[str]], rows: int = 0
+    ) -> None:
+        self.paths = paths
+        self.rows = rows
+        self.all_paths: dict[str, None] = {}
+        self.columns: dict[str, Column] = {}
+        self.reader = self.tlv(ty, "")
+
+    def __selected(self, prefix: str) -> bool:
+        return self.paths is not None and any(p.startswith(prefix) for p in self.paths)
+
+    def __scalar(self, path: str) -> Optional[Callable[[int, int], None]]:
+        self.all_paths[path] = None
+        if self.paths is None or path not in self.paths:
+            return None
+        present = np.zeros(self.rows, dtype=np.bool_)
+        values = np.zeros(self.rows, dtype=np.int64)
+        self.columns[path] = Column(present, values=values)
+
+        def sink(row: int, value: int) -> None:
+            present[row] = True
+            values[row] = value
+
+        return sink
+
+    def __opaque(self, path: str) -> Optional[Callable[[int, int, int], None]]:
+        self.all_paths[path] = None
+        if self.paths is None or path not in self.paths:
+            return None
+        present = np.zeros(self.rows, dtype=np.bool_)
+        offsets = np.full(self.rows, -1, dtype=np.int64)
+        lengths = np.zeros(self.rows, dtype=np.int64)
+        self.columns[path] = Column(present, offsets=offsets, lengths=lengths)
+
+        def sink(row: int, offset: int, length: int) -> None:
+            present[row] = True
+            offsets[row] = offset
+            lengths[row] = length
+
+        return sink
+
+    def __tag(self, prefix: str) -> Callable[[int, int], None]:
+        sinks = [
+            (shift, mask, field_sink)
+            for shift, mask, f in [
+                (6, 0b11, "Class"),
+                (5, 0b1, "Form"),
+                (0, 0x1F, "Num"),
+            ]
+            if (field_sink := self.__scalar(f"{prefix}Tag_{f}"))
+        ]
+
+        def sink(row: int, tag: int) -> None:
+            for shift, mask, s in sinks:
+                s(row, tag >> shift & mask)
+
+        return sink
+
+    def tlv(self, ty: prelude.BerType, prefix: str) -> Reader:
+        """The reader of the `tlv_ty` of `ty`."""
+        if isinstance(ty, prelude.ChoiceBerType):
+            return self.choice(ty, prefix)
+
+        selected = self.__selected(prefix)
+        tag = ty.tag.as_bytearray[0]
+        tag_sink = self.__tag(prefix)
+        lv = self.lv(ty, f"{prefix}Untagged_")
+
+        def read(data: bytes, pos: int, end: int, row: int) -> int:
+            if data[pos] != tag:
+                raise Asn2RflxError(
+                    f"unexpected tag 0x{data[pos]:02x} at offset {pos}"
+                    f" (expected 0x{tag:02x} for `{ty.full_ident}`)"
+                )
+            if not selected:
+                return pos + 2 + data[pos + 1]
+            tag_sink(row, tag)
+            return lv(data, pos + 1, end, row)
+
+        return read
+
+    def choice(self, ty: prelude.ChoiceBerType, prefix: str) -> Reader:
+        """The reader of a `CHOICE`, i.e. of a tagged union message."""
+        selected = self.__selected(prefix)
+        tag_sink = self.__tag(prefix)
+        variants = {
+            t.tag.as_bytearray[0]: self.lv(t, f"{prefix}{f}_")
+            for f, t in ty.flat_variants.items()
+        }
+
+        def read(data: bytes, pos: int, end: int, row: int) -> int:
+            tag = data[pos]
+            if tag not in variants:
+                raise Asn2RflxError(
+                    f"unexpected tag 0x{tag:02x} at offset {pos}"
+                    f" (no matching variant in `{ty.full_ident}`)"
+                )
+            if not selected:
+                return pos + 2 + data[pos + 1]
+            tag_sink(row, tag)
+            return variants[tag](data, pos + 1, end, row)
+
+        return read
+
+    def lv(self, ty: prelude.BerType, prefix: str) -> Reader:
+        """The reader of the `lv_ty` of `ty`."""
+        if isinstance(ty, prelude.ImplicitlyTaggedBerType):
+            return self.lv(ty.base, prefix)
+
+        len_sink = self.__scalar(f"{prefix}Length")
+        value = f"{prefix}Value"
+        content: Optional[Reader] = None
+        opaque_sink: Optional[Callable[[int, int, int], None]] = None
+        scalar_sink: Optional[Callable[[int, int], None]] = None
+        size: Optional[int] = None
+
+        if isinstance(ty, prelude.SequenceBerType):
+            fields = [self.tlv(t, f"{value}_{f}_") for f, t in ty.fields.items()]
+
+            def read_fields(data: bytes, pos: int, end: int, row: int) -> int:
+                for read_field in fields:
+                    pos = read_field(data, pos, end, row)
+                return pos
+
+            content = read_fields
+        elif isinstance(ty, prelude.ChoiceBerType):
+            content = self.choice(ty, f"{value}_")
+        elif isinstance(ty, prelude.DefiniteBerType):
+            v_ty = ty.v_ty()
+            if isinstance(v_ty, model.Scalar):
+                size = v_ty.size.value // 8
+                scalar_sink = self.__scalar(value)
+            else:
+                # The `NULL` case.
+                size = 0
+        else:
+            opaque_sink = self.__opaque(value)
+
+        def read(data: bytes, pos: int, end: int, row: int) -> int:
+            length = data[pos]
+            pos += 1
+            stop = pos + length
+            if stop > end:
+                raise Asn2RflxError(f"length {length} out of bounds at offset {pos}")
+            if size is not None and length != size:
+                raise Asn2RflxError(f"invalid length {length} at offset {pos}")
+            if len_sink:
+                len_sink(row, length)
+            if content and content(data, pos, stop, row) != stop:
+                raise Asn2RflxError(f"trailing data in value at offset {pos}")
+            if opaque_sink:
+                opaque_sink(row, pos, length)
+            if scalar_sink:
+                scalar_sink(row, int.from_bytes(data[pos:stop], "big"))
+            return stop
+
+        return read
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+import logging
+from dataclasses import dataclass, field
 from functools import singledispatchmethod
-from typing import cast
+from typing import Iterable, MutableMapping, Optional, cast
 
 import asn1tools as asn1
 from asn1tools.codecs import ber
@@ -9,6 +10,8 @@ from rflx import model
 from rflx.identifier import ID
 
 from asn2rflx import prelude
+from asn2rflx.error import Asn2RflxError, ProofTimeoutError
+from asn2rflx.proof import ProofFallback, Progress, prove
 from asn2rflx.utils import from_asn1_name, strid
 
 
@@ -30,6 +33,29 @@ class AsnTypeConverter:
     RecordFlux, those proofs will be executed again.
     """
 
+    proof_timeout: Optional[float] = None
+    """
+    The maximum time in seconds allowed for the proof of each converted type.
+    Only effective when `skip_proof` is `False`.
+    """
+
+    on_proof_timeout: ProofFallback = ProofFallback.SKIP
+    """What to do when the proof of a type has timed out."""
+
+    unproven: set[str] = field(default_factory=set, init=False)
+    """
+    The qualified ASN.1 names of the types whose proofs have been skipped after
+    timing out (or after one of their dependencies has).
+    """
+
+    cache: prelude.TypeCache = field(
+        default_factory=prelude.TypeCache, init=False, repr=False, compare=False
+    )
+    """
+    The RecordFlux types materialized by the conversions that are not given a
+    `TypeCache` of their own, so that they are proven only once per converter.
+    """
+
     def path(self, relpath: str) -> str:
         """Returns the absolute path of `relpath` relative to `self.base_path`."""
         return strid(list(filter(None, [self.base_path, relpath])))
@@ -116,10 +142,7 @@ class AsnTypeConverter:
     @convert.register  # type: ignore [no-redef]
     def _(self, sequence: ber.SequenceOf, relpath: str = "") -> prelude.BerType:
         res = prelude.SequenceOfBerType(
-            self.path(relpath),
-            self.convert(sequence.element_type, relpath).tlv_ty(
-                skip_proof=self.skip_proof
-            ),
+            self.path(relpath), self.convert(sequence.element_type, relpath)
         )
         return self.__convert_implicit(res, sequence, relpath)
 
@@ -146,19 +169,159 @@ class AsnTypeConverter:
             tag, self.path(relpath)
         )
 
-    def convert_spec(self, spec: asn1.compiler.Specification) -> dict[ID, model.Type]:
+    def convert_ber_spec(
+        self, spec: asn1.compiler.Specification
+    ) -> dict[str, prelude.BerType]:
+        """
+        Converts an ASN.1 specification to a mapping from qualified ASN.1 type names
+        (e.g. `RFC1157-SNMP.Message`) to the corresponding `BerType`.
+
+        No RecordFlux type is materialized at this stage.
+        """
+        return {
+            f"{path}.{name}": self.convert(ty.type, from_asn1_name(path))
+            for path, tys in spec.modules.items()
+            for name, ty in tys.items()
+        }
+
+    @staticmethod
+    def resolve_roots(
+        graph: dict[str, prelude.BerType], roots: Iterable[str]
+    ) -> list[str]:
+        """
+        Resolves the given root type names against the keys of `graph`.
+        A root can either be qualified (e.g. `RFC1157-SNMP.Message`) or not
+        (e.g. `Message`), as long as it is not ambiguous.
+        """
+        res: list[str] = []
+        for root in roots:
+            if root in graph:
+                res.append(root)
+                continue
+            found = [k for k in graph if k.endswith("." + root)]
+            if not found:
+                raise Asn2RflxError(f"unknown root type: `{root}`")
+            if len(found) > 1:
+                raise Asn2RflxError(
+                    f"ambiguous root type: `{root}` could be any of {found}"
+                )
+            res.append(found[0])
+        return res
+
+    def convert_reachable(
+        self, spec: asn1.compiler.Specification, roots: Optional[Iterable[str]] = None
+    ) -> dict[str, prelude.BerType]:
+        """
+        Like `convert_ber_spec`, but only keeps the types reachable from `roots`
+        (if given).
+        """
+        graph = self.convert_ber_spec(spec)
+        if roots is None:
+            return graph
+        reachable = set(
+            prelude.postorder(graph[r] for r in self.resolve_roots(graph, roots))
+        )
+        return {k: v for k, v in graph.items() if v in reachable}
+
+    @staticmethod
+    def materialization_order(
+        graph: dict[str, prelude.BerType],
+    ) -> list[tuple[prelude.BerType, list[str]]]:
+        """
+        Returns all the types reachable from `graph`, each one after its
+        dependencies, along with their names in `graph` (if any, since e.g. the
+        types of the fields of a `SEQUENCE` can be anonymous).
+
+        Types are materialized in this order, so that the proofs already done can be
+        reused, and those depending on unproven types can be detected.
+        """
+        names: dict[prelude.BerType, list[str]] = {}
+        for name, ber_ty in graph.items():
+            names.setdefault(ber_ty, []).append(name)
+        return [
+            (ber_ty, names.get(ber_ty, []))
+            for ber_ty in prelude.postorder(graph.values())
+        ]
+
+    def convert_spec(
+        self,
+        spec: asn1.compiler.Specification,
+        roots: Optional[Iterable[str]] = None,
+        store: Optional[MutableMapping[str, model.Type]] = None,
+        cache: Optional[prelude.TypeCache] = None,
+    ) -> dict[ID, model.Type]:
         """
         Converts an ASN.1 specification to a mapping from qualified RecordFlux
         identifiers to the corresponding RecordFlux type.
+
+        If `roots` is given, only the types reachable from these root types
+        are materialized.
+
+        If `store` is given, it is used to look up the types already materialized
+        from the same specification (by qualified ASN.1 name), and is updated with
+        the newly materialized ones.
+
+        The RecordFlux types are materialized in `cache` (see `BerType.tlv_ty`), or
+        in `self.cache` if not given, so that they can be reused by later
+        conversions.
         """
+        store = {} if store is None else store
+        cache = self.cache if cache is None else cache
+        graph = self.convert_reachable(spec, roots)
+
+        tys: dict[str, model.Type] = {}
+        unproven: set[prelude.BerType] = set()
+        # The progress is only worth reporting when the types are proven.
+        progress = None if self.skip_proof else Progress(len(graph))
+        for ber_ty, names in self.materialization_order(graph):
+            depends_on_unproven = any(
+                dep in unproven for dep in ber_ty.direct_dependencies
+            )
+            if depends_on_unproven:
+                # Also covers the anonymous types in between named ones.
+                unproven.add(ber_ty)
+            for name in names:
+                if name not in store:
+                    if not self.skip_proof and depends_on_unproven:
+                        logging.warning(
+                            f"Skipping proof of `{name}`: depends on unproven types"
+                        )
+                        self.unproven.add(name)
+                    store[name] = self.materialize(name, ber_ty, cache)
+                tys[name] = store[name]
+                if name in self.unproven:
+                    unproven.add(ber_ty)
+                if progress is not None:
+                    progress.advance(name)
+
         res: dict[ID, model.Type] = {}
-        for path, tys in spec.modules.items():
-            for ty in tys.values():
-                ty1 = self.convert(ty.type, from_asn1_name(path)).tlv_ty(
-                    skip_proof=self.skip_proof
-                )
-                ident = ty1.qualified_identifier
-                if not str(ident).startswith(prelude.PRELUDE_NAME):
-                    # Exclude `Prelude` types.
-                    res[ident] = ty1
+        for name in graph:
+            ty = tys[name]
+            ident = ty.qualified_identifier
+            if not str(ident).startswith(prelude.PRELUDE_NAME):
+                # Exclude `Prelude` types.
+                res[ident] = ty
         return res
+
+    def materialize(
+        self,
+        name: str,
+        ber_ty: prelude.BerType,
+        cache: Optional[prelude.TypeCache] = None,
+    ) -> model.Type:
+        """
+        Returns the `tlv_ty` of the type `name`, proving it if required,
+        while respecting `self.proof_timeout`.
+        The type is materialized in `cache`, or in `self.cache` if not given.
+        """
+        cache = self.cache if cache is None else cache
+        if self.skip_proof or name in self.unproven:
+            return ber_ty.tlv_ty(skip_proof=True, cache=cache)
+        try:
+            return prove(ber_ty, timeout=self.proof_timeout, cache=cache)
+        except ProofTimeoutError:
+            if self.on_proof_timeout == ProofFallback.FAIL:
+                raise
+            logging.warning(f"Skipping proof of `{name}`: timed out")
+            self.unproven.add(name)
+            return ber_ty.tlv_ty(skip_proof=True, cache=cache)
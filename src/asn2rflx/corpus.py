@@ -0,0 +1,392 @@
+import argparse
+import logging
+import random
+import string
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass, field
+from functools import lru_cache, singledispatchmethod
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence, cast
+
+import asn1tools as asn1
+from asn1tools.codecs import ber
+
+from asn2rflx import prelude
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.error import Asn2RflxError
+from asn2rflx.utils import init_logging
+
+CORPUS_SUFFIX: str = ".corpus"
+"""The suffix of the corpus files written by `write_corpus`."""
+
+CORPUS_LEN_SIZE: int = 4
+"""
+The size in bytes of the big-endian length prefix of each message in a corpus file.
+"""
+
+PRINTABLE_CHARS: str = string.ascii_letters + string.digits + " '()+,-./:=?"
+
+ParsedType = tuple[str, Mapping[str, Any]]
+"""
+A type definition of a parsed ASN.1 module (see `asn1.parse_files`), along with the
+name of the module in which the types it refers to are looked up.
+"""
+
+
+def is_short_form(data: bytes, start: int = 0, end: Optional[int] = None) -> bool:
+    """
+    Returns whether the BER encoding `data[start:end]` only consists of TLVs with
+    short tags and short lengths, i.e. whether it fits in the current restrictions
+    of the converted types (see `prelude.ASN_LENGTH_TY`).
+    """
+    end = len(data) if end is None else end
+    max_len = cast(int, prelude.ASN_LENGTH_TY.last.value)
+    while start < end:
+        if end - start < 2:
+            return False
+        tag, length = data[start], data[start + 1]
+        if tag & 0x1F == 0x1F or length > max_len:
+            return False
+        start += 2
+        if start + length > end:
+            return False
+        is_constructed = tag >> 5 & 1 == prelude.AsnTagForm.CONSTRUCTED
+        if is_constructed and not is_short_form(data, start, start + length):
+            return False
+        start += length
+    return True
+
+
+@dataclass
+class AsnValueGenerator:
+    """
+    A generator of random `asn1tools` values for the ASN.1 types that can be
+    converted by `AsnTypeConverter`.
+    """
+
+    rng: random.Random
+
+    max_size: int = 8
+    """The maximum size of the generated strings."""
+
+    max_items: int = 3
+    """The maximum number of items of the generated `SEQUENCE OF`s."""
+
+    modules: Mapping[str, Any] = field(default_factory=dict)
+    """
+    The parsed ASN.1 modules of the generated types (see `asn1.parse_files`), whose
+    size and value range constraints are respected. The types not found in them are
+    generated without constraints.
+    """
+
+    # In Python 3.10+ this should be done with the `match-case` construct...
+    @singledispatchmethod
+    def generate(self, val, parsed: Optional[ParsedType] = None) -> Any:
+        """
+        Generates a random value of an ASN.1 type, within the constraints of its
+        definition `parsed` (see `AsnValueGenerator.modules`) if given.
+        """
+        raise NotImplementedError(f"generation not implemented for {val}")
+
+    def __lookup(self, module: str, name: str) -> Optional[ParsedType]:
+        """The definition of the type `name` as seen from `module`, if any."""
+        if module not in self.modules:
+            return None
+        if name in self.modules[module]["types"]:
+            return (module, self.modules[module]["types"][name])
+        for imported, names in self.modules[module].get("imports", {}).items():
+            if name in names:
+                return self.__lookup(imported, name)
+        return None
+
+    def __definitions(self, parsed: Optional[ParsedType]) -> Iterator[ParsedType]:
+        """Yields `parsed` and the definitions of the types it refers to in turn."""
+        while parsed is not None:
+            yield parsed
+            module, ty = parsed
+            parsed = self.__lookup(module, ty["type"])
+
+    def __constraint(self, parsed: Optional[ParsedType], key: str) -> Optional[list]:
+        """The constraint `key` (e.g. `size`) of `parsed` or of its referred types."""
+        return next(
+            (ty[key] for _, ty in self.__definitions(parsed) if key in ty), None
+        )
+
+    def __member(self, parsed: Optional[ParsedType], name: str) -> Optional[ParsedType]:
+        """The definition of the member `name` of a `SEQUENCE` or `CHOICE`."""
+        for module, ty in self.__definitions(parsed):
+            for member in ty.get("members", []):
+                if isinstance(member, dict) and member.get("name") == name:
+                    return (module, member)
+        return None
+
+    def __element(self, parsed: Optional[ParsedType]) -> Optional[ParsedType]:
+        """The definition of the elements of a `SEQUENCE OF`."""
+        for module, ty in self.__definitions(parsed):
+            if "element" in ty:
+                return (module, ty["element"])
+        return None
+
+    def __pick(self, constraint: Optional[list], low: int, high: int) -> int:
+        """
+        Returns a random integer within one of the alternatives of `constraint` (as
+        parsed by `asn1.parse_files`, e.g. `[(0, 'MAX')]`), preferably in
+        `[low, high]`.
+        """
+        alternatives = [c for c in constraint or [] if c is not None]
+        if not alternatives:
+            return self.rng.randint(low, high)
+        alt = self.rng.choice(alternatives)
+        lower, upper = alt if isinstance(alt, tuple) else (alt, alt)
+        if lower == "MIN" and upper == "MAX":
+            return self.rng.randint(low, high)
+        if lower == "MIN" and isinstance(upper, int):
+            lower = min(low, upper)
+        if upper == "MAX" and isinstance(lower, int):
+            upper = max(high, lower)
+        if not isinstance(lower, int) or not isinstance(upper, int):
+            # E.g. bounds referring to values defined elsewhere.
+            return self.rng.randint(low, high)
+        if max(lower, low) <= min(upper, high):
+            lower, upper = max(lower, low), min(upper, high)
+        return self.rng.randint(lower, upper)
+
+    def __size(self, parsed: Optional[ParsedType] = None) -> int:
+        return self.__pick(self.__constraint(parsed, "size"), 0, self.max_size)
+
+    # ASN.1 Types
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, val: ber.Boolean, parsed: Optional[ParsedType] = None) -> Any:
+        return self.rng.random() < 0.5
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, val: ber.Null, parsed: Optional[ParsedType] = None) -> Any:
+        return None
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, val: ber.Integer, parsed: Optional[ParsedType] = None) -> Any:
+        bound = 256 ** self.rng.randint(0, self.max_size)
+        return self.__pick(
+            self.__constraint(parsed, "restricted-to"), -bound, bound - 1
+        )
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, val: ber.ObjectIdentifier, parsed: Optional[ParsedType] = None) -> Any:
+        first = self.rng.randint(0, 2)
+        # `asn1tools` cannot decode a second arc above 39 when the first one is 2.
+        second = self.rng.randint(0, 39)
+        rest = (self.rng.randint(0, 2**16) for _ in range(self.__size()))
+        return ".".join(map(str, [first, second, *rest]))
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, val: ber.BitString, parsed: Optional[ParsedType] = None) -> Any:
+        size = self.__size()
+        # The size of a `BIT STRING` is constrained in bits.
+        bits = self.__pick(self.__constraint(parsed, "size"), 0, 8 * size)
+        size = max(size, -(-bits // 8))
+        data = int.from_bytes(self.rng.randbytes(size), "big")
+        # Unused trailing bits must be zero for the value to roundtrip.
+        data &= ~((1 << (8 * size - bits)) - 1)
+        return (data.to_bytes(size, "big"), bits)
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, val: ber.OctetString, parsed: Optional[ParsedType] = None) -> Any:
+        return self.rng.randbytes(self.__size(parsed))
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, val: ber.PrintableString, parsed: Optional[ParsedType] = None) -> Any:
+        return "".join(self.rng.choices(PRINTABLE_CHARS, k=self.__size(parsed)))
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, val: ber.IA5String, parsed: Optional[ParsedType] = None) -> Any:
+        return "".join(map(chr, self.rng.choices(range(128), k=self.__size(parsed))))
+
+    # ASN.1 type constructors
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, message: ber.Sequence, parsed: Optional[ParsedType] = None) -> Any:
+        fields: list[ber.Type] = message.root_members
+        return {
+            field.name: self.generate(field, self.__member(parsed, field.name))
+            for field in fields
+        }
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, sequence: ber.SequenceOf, parsed: Optional[ParsedType] = None) -> Any:
+        items = self.__pick(self.__constraint(parsed, "size"), 0, self.max_items)
+        element = self.__element(parsed)
+        return [self.generate(sequence.element_type, element) for _ in range(items)]
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, message: ber.Choice, parsed: Optional[ParsedType] = None) -> Any:
+        field: ber.Type = self.rng.choice(message.members)
+        return (field.name, self.generate(field, self.__member(parsed, field.name)))
+
+    @generate.register  # type: ignore [no-redef]
+    def _(self, tagged: ber.ExplicitTag, parsed: Optional[ParsedType] = None) -> Any:
+        # The tag and the constraints of the inner type share the same definition.
+        return self.generate(cast(ber.Type, tagged.inner), parsed)
+
+    def messages(self, ty: ber.CompiledType, max_tries: int = 100) -> Iterator[bytes]:
+        """
+        Yields an infinite stream of random BER encoded messages of the given type,
+        within the constraints of its definition in `self.modules` if any.
+        Only messages that fit in the current restrictions are yielded.
+        """
+        parsed = self.__lookup(ty.module_name, ty.name)
+        while True:
+            for _ in range(max_tries):
+                data = ty.encode(self.generate(ty.type, parsed))
+                if is_short_form(data):
+                    yield data
+                    break
+            else:
+                raise Asn2RflxError(
+                    f"failed to generate a short-form message of type `{ty.name}`"
+                    f" in {max_tries} tries, consider lowering the generated sizes"
+                )
+
+
+@lru_cache
+def parse_files(files: tuple[str, ...]) -> dict[str, Any]:
+    """`asn1.parse_files`, but cached in each corpus generation process."""
+    return asn1.parse_files(list(files))
+
+
+@lru_cache
+def compile_files(files: tuple[str, ...]) -> asn1.compiler.Specification:
+    """`asn1.compile_files`, but cached in each corpus generation process."""
+    # `asn1.compile_dict` modifies the parsed modules.
+    return asn1.compile_dict(deepcopy(parse_files(files)))
+
+
+def generate_chunk(
+    files: tuple[str, ...], module: str, name: str, count: int, seed: str
+) -> bytes:
+    """
+    Generates `count` length-delimited random messages of type `module.name`.
+    This is the unit of work of a corpus generation process.
+    """
+    ty = compile_files(files).modules[module][name]
+    gen = AsnValueGenerator(random.Random(seed), modules=parse_files(files))
+    messages = gen.messages(ty)
+    return b"".join(
+        len(data).to_bytes(CORPUS_LEN_SIZE, "big") + data
+        for data in (next(messages) for _ in range(count))
+    )
+
+
+def read_corpus(data: bytes) -> Iterator[bytes]:
+    """Yields the messages in the given length-delimited corpus."""
+    pos = 0
+    while pos < len(data):
+        length = int.from_bytes(data[pos : pos + CORPUS_LEN_SIZE], "big")
+        pos += CORPUS_LEN_SIZE
+        yield data[pos : pos + length]
+        pos += length
+
+
+def write_corpus(
+    files: Sequence[str],
+    outputdir: Path,
+    count: int,
+    roots: Optional[Iterable[str]] = None,
+    seed: int = 0,
+    jobs: Optional[int] = None,
+    chunk_size: int = 10_000,
+) -> list[Path]:
+    """
+    Writes a corpus of `count` length-delimited random BER messages for each type
+    in the given ASN.1 specifications (or only for `roots` if given) to
+    `outputdir`, and returns the paths of the corpus files.
+
+    The generation is split in chunks of `chunk_size` messages which are handled by
+    `jobs` processes. For a given `seed`, the output is always the same.
+    """
+    files1 = tuple(files)
+    graph = AsnTypeConverter().convert_ber_spec(compile_files(files1))
+    names = (
+        list(graph) if roots is None else AsnTypeConverter.resolve_roots(graph, roots)
+    )
+
+    res: list[Path] = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for qualified_name in names:
+            module, name = qualified_name.split(".", 1)
+            path = outputdir / f"{qualified_name}{CORPUS_SUFFIX}"
+            logging.info(f"Generating {count} messages in `{path}`...")
+            counts = [chunk_size] * (count // chunk_size)
+            if count % chunk_size:
+                counts.append(count % chunk_size)
+            # `str` seeds are hashed deterministically by `random.Random`.
+            seeds = [f"{seed}:{qualified_name}:{i}" for i in range(len(counts))]
+            chunks = executor.map(
+                generate_chunk,
+                repeat(files1),
+                repeat(module),
+                repeat(name),
+                counts,
+                seeds,
+            )
+            with path.open("wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            res.append(path)
+    return res
+
+
+def main(args: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="asn2rflx corpus",
+        description="Generates corpora of random BER messages for benchmarking.",
+    )
+    parser.add_argument(
+        "-o", "--outputdir", default=".", help="the output directory of corpus files"
+    )
+    parser.add_argument(
+        "-v", "--verbosity", action="count", help="the logging verbosity"
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=1000,
+        help="the number of messages to generate for each type",
+    )
+    parser.add_argument(
+        "-r",
+        "--root",
+        action="append",
+        metavar="TYPE",
+        help="only generate messages of type TYPE (can be repeated)",
+    )
+    parser.add_argument(
+        "-s", "--seed", type=int, default=0, help="the seed of the random generator"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="the number of generator processes (defaults to the number of CPUs)",
+    )
+    parser.add_argument(
+        "FILE", nargs="+", help="the .asn specification(s) to generate messages for"
+    )
+    opts = parser.parse_args(args)
+
+    init_logging(opts.verbosity)
+
+    outputdir = Path(opts.outputdir)
+    outputdir.mkdir(parents=True, exist_ok=True)
+    write_corpus(
+        opts.FILE,
+        outputdir,
+        opts.count,
+        roots=opts.root,
+        seed=opts.seed,
+        jobs=opts.jobs,
+    )
+    logging.info("Generating corpora done!")
@@ -0,0 +1,483 @@
+"""
+Distribution of the proofs of a conversion to workers sharing a job queue directory
+(e.g. on a network file system).
+
+The jobs and their results are pickled, so the queue directory must only be
+writable by trusted users.
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, MutableMapping, Optional, Sequence
+
+import asn1tools as asn1
+from rflx import model
+
+from asn2rflx import prelude
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.error import Asn2RflxError, ProofTimeoutError
+from asn2rflx.output import write_if_changed
+from asn2rflx.proof import ProofFallback, Progress, prove
+from asn2rflx.utils import init_logging
+
+
+@dataclass(frozen=True)
+class Job:
+    """The proof of a type."""
+
+    name: str
+    """The qualified ASN.1 name of the type."""
+
+    ty: prelude.BerType
+
+    timeout: Optional[float]
+    """The maximum time in seconds allowed for the proof."""
+
+    lease_timeout: float
+    """The time after which the job is given to another worker without heartbeat."""
+
+    proven: frozenset[prelude.BerType] = frozenset()
+    """
+    The dependencies of `ty` that have already been proven (e.g. by other jobs),
+    which are therefore not proven again.
+    """
+
+
+@dataclass(frozen=True)
+class JobResult:
+    """The outcome of a `Job`."""
+
+    name: str
+
+    ty: Optional[model.Type] = None
+    """The proven type, if the proof has succeeded."""
+
+    types: dict[prelude.CacheKey, model.Type] = field(default_factory=dict)
+    """The types proven by the job, including those of the anonymous inner types."""
+
+    error: Optional[str] = None
+
+    timed_out: bool = False
+
+
+@dataclass
+class JobQueue:
+    """
+    A job queue in a shared directory.
+
+    Each job is a file which goes through the following subdirectories:
+
+    - `pending/`: the job has been submitted;
+    - `leased/`: the job has been taken by a worker, by atomically renaming it
+      (suffixed with the worker ID), so that a job can only be leased once.
+      The worker keeps the lease alive by updating its modification time.
+      When a lease has expired, i.e. when its worker has crashed or has been cut off,
+      the job is moved back to `pending/`;
+    - `done/`: the result of the job has been written (atomically).
+    """
+
+    root: Path
+
+    def __post_init__(self) -> None:
+        for d in [self.pending, self.leased, self.done]:
+            d.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def pending(self) -> Path:
+        return self.root / "pending"
+
+    @property
+    def leased(self) -> Path:
+        return self.root / "leased"
+
+    @property
+    def done(self) -> Path:
+        return self.root / "done"
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the workers of this queue have been asked to stop."""
+        return (self.root / "stop").exists()
+
+    def stop(self) -> None:
+        """Asks the workers of this queue to stop."""
+        (self.root / "stop").touch()
+
+    def resume(self) -> None:
+        """Lets new workers run the jobs of this queue after `stop`."""
+        (self.root / "stop").unlink(missing_ok=True)
+
+    def now(self) -> float:
+        """
+        The current time according to the file system, which is used to check the
+        leases, so that the clocks of the machines do not need to be synchronized.
+        """
+        clock = self.root / "clock"
+        clock.touch()
+        return clock.stat().st_mtime
+
+    def submit(self, job_id: str, job: Job) -> None:
+        write_if_changed(self.pending / f"{job_id}.job", pickle.dumps(job))
+
+    def pending_jobs(self, prefix: str = "") -> set[str]:
+        """The IDs of the pending jobs whose ID starts with `prefix`."""
+        return {
+            path.name.split(".", 1)[0] for path in self.pending.glob(f"{prefix}*.job")
+        }
+
+    def lease(self, worker: str) -> Optional[tuple[Path, Job]]:
+        """
+        Leases the oldest pending job, returning the path of its lease and the job.
+        """
+        for path in sorted(self.pending.glob("*.job")):
+            lease = self.leased / f"{path.name}.{worker}"
+            try:
+                os.rename(path, lease)
+                # The lease starts now, not at the submission of the job.
+                os.utime(lease)
+                return lease, pickle.loads(lease.read_bytes())
+            except FileNotFoundError:
+                # Leased by another worker, or already expired.
+                continue
+        return None
+
+    def heartbeat(self, lease: Path) -> bool:
+        """Renews a lease, returning whether it is still held."""
+        try:
+            os.utime(lease)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, lease: Path, result: JobResult) -> None:
+        job_id = lease.name.split(".", 1)[0]
+        write_if_changed(self.done / f"{job_id}.result", pickle.dumps(result))
+        lease.unlink(missing_ok=True)
+
+    def results(self, prefix: str = "") -> Iterator[tuple[str, JobResult]]:
+        """Yields and removes the results of the jobs whose ID starts with `prefix`."""
+        for path in sorted(self.done.glob(f"{prefix}*.result")):
+            res = pickle.loads(path.read_bytes())
+            path.unlink()
+            yield path.name.split(".", 1)[0], res
+
+    def requeue_expired(self) -> list[str]:
+        """Moves the jobs whose lease has expired back to `pending/`."""
+        now = self.now()
+        res: list[str] = []
+        for lease in self.leased.glob("*.job.*"):
+            try:
+                job: Job = pickle.loads(lease.read_bytes())
+                if now - lease.stat().st_mtime <= job.lease_timeout:
+                    continue
+                job_id = lease.name.split(".", 1)[0]
+                os.rename(lease, self.pending / f"{job_id}.job")
+            except FileNotFoundError:
+                # The job has just been completed.
+                continue
+            logging.warning(f"Lease of `{job.name}` has expired, requeueing it")
+            res.append(job_id)
+        return res
+
+    def cancel(self, prefix: str) -> None:
+        """Removes the pending jobs and the results whose ID starts with `prefix`."""
+        for path in [
+            *self.pending.glob(f"{prefix}*.job"),
+            *self.done.glob(f"{prefix}*.result"),
+        ]:
+            path.unlink(missing_ok=True)
+
+
+def run_job(job: Job) -> JobResult:
+    cache = prelude.TypeCache(proven=set(job.proven))
+    try:
+        ty = prove(job.ty, timeout=job.timeout, cache=cache)
+    except ProofTimeoutError as e:
+        return JobResult(job.name, error=str(e), timed_out=True)
+    except Exception as e:
+        return JobResult(
+            job.name, error=f"{e}: {e.__cause__}" if e.__cause__ else str(e)
+        )
+    types = {
+        key: t
+        for key, t in cache.types.items()
+        if not key[2] and key[0] not in job.proven
+    }
+    return JobResult(job.name, ty=ty, types=types)
+
+
+def run_worker(
+    queue: JobQueue,
+    worker: Optional[str] = None,
+    poll_interval: float = 0.5,
+    idle_timeout: Optional[float] = None,
+) -> int:
+    """
+    Runs the jobs of `queue` until it is stopped, or until no job has been found for
+    `idle_timeout` seconds. Returns the number of jobs run.
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    count = 0
+    idle_since = time.monotonic()
+    while not queue.stopped:
+        leased = queue.lease(worker)
+        if leased is None:
+            if idle_timeout and time.monotonic() - idle_since > idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+        lease, job = leased
+        logging.info(f"Proving `{job.name}`...")
+        done = threading.Event()
+
+        def heartbeat() -> None:
+            while not done.wait(job.lease_timeout / 4):
+                if not queue.heartbeat(lease):
+                    logging.warning(f"Lease of `{job.name}` has been lost")
+                    return
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            result = run_job(job)
+        finally:
+            done.set()
+            thread.join()
+        queue.complete(lease, result)
+        count += 1
+        idle_since = time.monotonic()
+    return count
+
+
+@dataclass
+class Coordinator:
+    """
+    Distributes the proofs of the conversions of a converter to the workers of a
+    `JobQueue`, as one job per type, each one being submitted once all the types it
+    depends on have been proven.
+    """
+
+    queue: JobQueue
+
+    converter: AsnTypeConverter
+
+    lease_timeout: float = 60.0
+    """
+    The time in seconds after which a job is given to another worker if its worker
+    has not sent any heartbeat.
+    """
+
+    poll_interval: float = 0.5
+
+    deadline: Optional[float] = None
+    """The maximum time in seconds allowed for proving a specification."""
+
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    """The prefix of the IDs of the jobs of this coordinator."""
+
+    def prove_spec(
+        self,
+        spec: asn1.compiler.Specification,
+        roots: Optional[Iterable[str]] = None,
+        store: Optional[MutableMapping[str, model.Type]] = None,
+        cache: Optional[prelude.TypeCache] = None,
+    ) -> MutableMapping[str, model.Type]:
+        """
+        Proves the types of `spec` (see `AsnTypeConverter.convert_spec`) with the
+        workers of the queue, and adds them to `store`. The types proven by the
+        workers are also added to `cache` (the `TypeCache` of the converter if not
+        given), and those already proven in it are not proven again by the workers.
+
+        Types whose proofs have timed out are marked as unproven in the converter,
+        so that `convert_spec` (with the same `store`) finishes the conversion.
+
+        A stopped queue is resumed (see `JobQueue.resume`). Raises an
+        `Asn2RflxError` when the proofs have not finished within `deadline`.
+        """
+        store = {} if store is None else store
+        cache = self.converter.cache if cache is None else cache
+        if self.converter.skip_proof:
+            return store
+
+        # The types to prove, the ones among them that each type depends on (either
+        # directly or through anonymous types), and the anonymous types reached.
+        names: dict[prelude.BerType, list[str]] = {}
+        waiting: dict[prelude.BerType, set[prelude.BerType]] = {}
+        anonymous: dict[prelude.BerType, set[prelude.BerType]] = {}
+        blocked: set[prelude.BerType] = set()
+        for ber_ty, ty_names in self.converter.materialization_order(
+            self.converter.convert_reachable(spec, roots)
+        ):
+            waiting[ber_ty] = set().union(
+                *({d} if d in names else waiting[d] for d in ber_ty.direct_dependencies)
+            )
+            anonymous[ber_ty] = set().union(
+                *(
+                    set() if d in names else {d} | anonymous[d]
+                    for d in ber_ty.direct_dependencies
+                )
+            )
+            if any(d in blocked for d in ber_ty.direct_dependencies) or any(
+                name in self.converter.unproven for name in ty_names
+            ):
+                # Let `convert_spec` deal with the types depending on unproven ones.
+                blocked.add(ber_ty)
+            elif todo := [name for name in ty_names if name not in store]:
+                names[ber_ty] = todo
+        proven_tys = {key[0] for key in cache.types if not key[2]}
+        # An anonymous type is proven by the first job reaching it, which the
+        # other jobs reaching it wait for.
+        owners: dict[prelude.BerType, prelude.BerType] = {}
+        for ber_ty in names:
+            for anon in anonymous[ber_ty] - proven_tys:
+                if (owner := owners.setdefault(anon, ber_ty)) != ber_ty:
+                    waiting[ber_ty].add(owner)
+        deps = {ty: waiting[ty] for ty in names}
+        jobs: dict[str, prelude.BerType] = {}
+        progress = Progress(len(names))
+
+        def proven_deps(ty: prelude.BerType) -> frozenset[prelude.BerType]:
+            """The proven types reached first when walking the dependencies of `ty`."""
+            res: set[prelude.BerType] = set()
+            todo, seen = list(ty.direct_dependencies), set()
+            while todo:
+                if (dep := todo.pop()) in seen:
+                    continue
+                seen.add(dep)
+                if dep in proven_tys:
+                    res.add(dep)
+                else:
+                    todo.extend(dep.direct_dependencies)
+            return frozenset(res)
+
+        def submit_ready() -> None:
+            for ty in [ty for ty, ds in deps.items() if not ds]:
+                del deps[ty]
+                job_id = f"{self.run_id}-{len(jobs):06d}"
+                jobs[job_id] = ty
+                job = Job(
+                    names[ty][0],
+                    ty,
+                    self.converter.proof_timeout,
+                    self.lease_timeout,
+                    proven_deps(ty),
+                )
+                self.queue.submit(job_id, job)
+
+        def finish(ty: prelude.BerType, proven: bool) -> None:
+            if not proven:
+                # Let `convert_spec` deal with the types depending on this one.
+                for dependent in [t for t, ds in deps.items() if ty in ds]:
+                    del deps[dependent]
+                    progress.advance(names[dependent][0])
+            for ds in deps.values():
+                ds.discard(ty)
+
+        self.queue.resume()
+        start = idle_since = time.monotonic()
+        pending: set[str] = set()
+        try:
+            submit_ready()
+            while jobs:
+                for job_id, res in self.queue.results(self.run_id):
+                    if (ty := jobs.pop(job_id, None)) is None:
+                        continue
+                    idle_since = time.monotonic()
+                    if res.ty is not None:
+                        for name in names[ty]:
+                            store[name] = res.ty
+                        cache.types.update(res.types)
+                        proven_tys.update(key[0] for key in res.types)
+                    elif res.timed_out:
+                        if self.converter.on_proof_timeout == ProofFallback.FAIL:
+                            raise ProofTimeoutError(res.error)
+                        logging.warning(f"Skipping proof of `{res.name}`: timed out")
+                        self.converter.unproven.update(names[ty])
+                    else:
+                        raise Asn2RflxError(res.error)
+                    progress.advance(res.name)
+                    finish(ty, proven=res.ty is not None)
+                    submit_ready()
+                if not jobs:
+                    break
+                now = time.monotonic()
+                if self.deadline is not None and now - start > self.deadline:
+                    raise Asn2RflxError(
+                        f"proofs not finished after {self.deadline} s"
+                        f" ({len(jobs)} job(s) left in `{self.queue.root}`)"
+                    )
+                self.queue.requeue_expired()
+                # A job has been leased when it has left `pending/`.
+                previous, pending = pending, self.queue.pending_jobs(self.run_id)
+                if previous - pending or not pending:
+                    idle_since = now
+                elif now - idle_since > self.lease_timeout:
+                    logging.warning(
+                        f"No job leased for {self.lease_timeout} s, is an"
+                        f" `asn2rflx worker` running on `{self.queue.root}`?"
+                    )
+                    idle_since = now
+                time.sleep(self.poll_interval)
+        finally:
+            self.queue.cancel(self.run_id)
+        return store
+
+
+def main(args: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="asn2rflx worker",
+        description="Runs the proof jobs of a shared job queue (see `--queue`).",
+    )
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument(
+        "--stop",
+        action="store_true",
+        help="ask the workers of the queue to stop, and new ones to exit immediately",
+    )
+    action.add_argument(
+        "--resume",
+        action="store_true",
+        help="let new workers run the jobs of the queue again after `--stop`",
+    )
+    parser.add_argument(
+        "-v", "--verbosity", action="count", help="the logging verbosity"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="the time to wait between two lookups of the queue",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="exit after not finding any job for SECONDS",
+    )
+    parser.add_argument("QUEUE", help="the job queue directory")
+    opts = parser.parse_args(args)
+
+    init_logging(opts.verbosity)
+
+    queue = JobQueue(Path(opts.QUEUE))
+    if opts.stop:
+        queue.stop()
+        return
+    if opts.resume:
+        queue.resume()
+        return
+    count = run_worker(
+        queue,
+        poll_interval=opts.poll_interval,
+        idle_timeout=opts.idle_timeout,
+    )
+    logging.info(f"Worker done after running {count} job(s)")
@@ -0,0 +1,191 @@
+"""
+BER encoders compiled out of the `BerType` graph, e.g. to generate traffic quickly.
+
+The values are those of `asn1tools`, except that the fields of `SEQUENCE`s and
+`CHOICE`s are named as in the converted types (see `utils.from_asn1_name`).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional, cast
+
+from asn2rflx import prelude
+from asn2rflx.error import Asn2RflxError
+
+Encoder = Callable[[bytearray, Any], None]
+"""A function appending the encoding of a value to a buffer."""
+
+
+def _boolean(buf: bytearray, value: Any) -> None:
+    buf.append(0xFF if value else 0x00)
+
+
+def _null(buf: bytearray, value: Any) -> None:
+    pass
+
+
+def _integer(buf: bytearray, value: Any) -> None:
+    size = (8 + (value + (value < 0)).bit_length()) // 8
+    buf += value.to_bytes(size, "big", signed=True)
+
+
+def _subidentifier(buf: bytearray, value: int) -> None:
+    start = len(buf)
+    buf.append(value & 0x7F)
+    value >>= 7
+    while value:
+        buf.insert(start, 0x80 | value & 0x7F)
+        value >>= 7
+
+
+def _object_identifier(buf: bytearray, value: Any) -> None:
+    arcs = [int(arc) for arc in value.split(".")]
+    _subidentifier(buf, 40 * arcs[0] + arcs[1])
+    for arc in arcs[2:]:
+        _subidentifier(buf, arc)
+
+
+def _bit_string(buf: bytearray, value: Any) -> None:
+    data, bits = value
+    size, rest = divmod(bits, 8)
+    buf.append(8 - rest if rest else 0)
+    buf += data[:size]
+    if rest:
+        buf.append(data[size] & (0xFF >> rest ^ 0xFF))
+
+
+def _octet_string(buf: bytearray, value: Any) -> None:
+    buf += value
+
+
+def _ascii_string(buf: bytearray, value: Any) -> None:
+    buf += value.encode("ascii")
+
+
+PRIMITIVE_ENCODERS: dict[prelude.BerType, Encoder] = {
+    prelude.BOOLEAN: _boolean,
+    prelude.NULL: _null,
+    prelude.INTEGER: _integer,
+    prelude.OBJECT_IDENTIFIER: _object_identifier,
+    prelude.BIT_STRING: _bit_string,
+    prelude.OCTET_STRING: _octet_string,
+    prelude.PrintableString: _ascii_string,
+    prelude.IA5String: _ascii_string,
+}
+"""The encoders of the contents of the prelude types."""
+
+
+@dataclass
+class _Compiler:
+    """Compiles the encoders of `BerType`s, sharing those of common subtypes."""
+
+    max_length: int = cast(int, prelude.ASN_LENGTH_TY.last.value)
+
+    encoders: dict[prelude.BerType, Encoder] = field(default_factory=dict)
+
+    def tlv(self, ty: prelude.BerType) -> Encoder:
+        """The encoder of the `tlv_ty` of `ty`."""
+        if ty not in self.encoders:
+            self.encoders[ty] = (
+                self.choice(ty)
+                if isinstance(ty, prelude.ChoiceBerType)
+                else self.tagged(ty.tag.as_bytearray[0], self.content(ty))
+            )
+        return self.encoders[ty]
+
+    def tagged(self, tag: int, content: Encoder) -> Encoder:
+        max_length = self.max_length
+
+        def encode(buf: bytearray, value: Any) -> None:
+            buf.append(tag)
+            # The length is patched once the contents have been encoded.
+            buf.append(0)
+            start = len(buf)
+            content(buf, value)
+            length = len(buf) - start
+            if length > max_length:
+                raise Asn2RflxError(f"unsupported long length {length}")
+            buf[start - 1] = length
+
+        return encode
+
+    def choice(self, ty: prelude.ChoiceBerType) -> Encoder:
+        variants = {f: self.tlv(t) for f, t in ty.variants.items()}
+
+        def encode(buf: bytearray, value: Any) -> None:
+            variant, inner = value
+            variants[variant](buf, inner)
+
+        return encode
+
+    def content(self, ty: prelude.BerType) -> Encoder:
+        """The encoder of the value of the `lv_ty` of `ty`."""
+        if isinstance(ty, prelude.ImplicitlyTaggedBerType):
+            return self.content(ty.base)
+        if ty in PRIMITIVE_ENCODERS:
+            return PRIMITIVE_ENCODERS[ty]
+        if isinstance(ty, prelude.ExplicitBerType):
+            return self.tlv(ty.inner)
+        if isinstance(ty, prelude.SequenceBerType):
+            fields = [(f, self.tlv(t)) for f, t in ty.fields.items()]
+
+            def encode_fields(buf: bytearray, value: Any) -> None:
+                for f, encode in fields:
+                    encode(buf, value[f])
+
+            return encode_fields
+        if isinstance(ty, prelude.SequenceOfBerType):
+            encode_elem = self.tlv(ty.elem)
+
+            def encode_elems(buf: bytearray, value: Any) -> None:
+                for elem in value:
+                    encode_elem(buf, elem)
+
+            return encode_elems
+        if isinstance(ty, prelude.ChoiceBerType):
+            return self.choice(ty)
+        raise NotImplementedError(f"encoding not implemented for `{ty.full_ident}`")
+
+
+@dataclass
+class BerEncoder:
+    """A BER encoder specialized for a `BerType`."""
+
+    ty: prelude.BerType
+
+    _encode: Encoder = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._encode = _Compiler().tlv(self.ty)
+
+    def encode_into(self, buf: bytearray, value: Any) -> None:
+        """Appends the encoding of `value` to `buf`."""
+        end = len(buf)
+        try:
+            self._encode(buf, value)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            del buf[end:]
+            raise Asn2RflxError(
+                f"cannot encode `{value!r}` as `{self.ty.full_ident}`"
+            ) from e
+        except Asn2RflxError:
+            del buf[end:]
+            raise
+
+    def encode(self, value: Any) -> bytes:
+        buf = bytearray()
+        self.encode_into(buf, value)
+        return bytes(buf)
+
+    def encode_batch(
+        self, values: Iterable[Any], buf: Optional[bytearray] = None
+    ) -> tuple[bytearray, list[int]]:
+        """
+        Encodes `values` one after the other into `buf` (or a new buffer),
+        returning the buffer and the end offset of each encoded value.
+        """
+        buf = bytearray() if buf is None else buf
+        ends: list[int] = []
+        for value in values:
+            self.encode_into(buf, value)
+            ends.append(len(buf))
+        return buf, ends
@@ -1,2 +1,6 @@
 class Asn2RflxError(Exception):
     pass
+
+
+class ProofTimeoutError(Asn2RflxError):
+    pass
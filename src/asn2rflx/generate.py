@@ -0,0 +1,86 @@
+import logging
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Optional, Sequence
+
+from rflx.common import file_name
+from rflx.const import BUILTINS_PACKAGE, INTERNAL_PACKAGE
+from rflx.generator import Generator
+from rflx.identifier import ID
+from rflx.integration import Integration
+from rflx.model import Model, Type
+
+from asn2rflx.assemble import AssembledModel
+
+DEFAULT_PREFIX: str = "RFLX"
+"""The default prefix of the generated SPARK packages, as in `rflx generate`."""
+
+
+def packages(types: Sequence[Type]) -> dict[ID, list[Type]]:
+    """Groups the given types by package, excluding RecordFlux's own packages."""
+    res: dict[ID, list[Type]] = {}
+    for ty in types:
+        if ty.package not in [BUILTINS_PACKAGE, INTERNAL_PACKAGE]:
+            res.setdefault(ty.package, []).append(ty)
+    return res
+
+
+def generate_package(
+    package: ID, types: Sequence[Type], directory: Path, prefix: str
+) -> float:
+    """
+    Generates the SPARK units of `package` out of its `types` into `directory`,
+    and returns the time it took in seconds.
+
+    Only the units of `package` are generated, those of its dependencies are
+    expected to be generated separately: the types of the other packages are not
+    part of the (unchecked) model given to the generator.
+    """
+    start = time.perf_counter()
+    unit = file_name(str(ID(prefix) * package if prefix else package))
+    with tempfile.TemporaryDirectory() as tmp:
+        Generator(prefix).generate(
+            AssembledModel(types),
+            Integration(),
+            Path(tmp),
+            library_files=False,
+            top_level_package=False,
+        )
+        for f in Path(tmp).iterdir():
+            if f.stem == unit or f.stem.startswith(unit + "-"):
+                shutil.move(str(f), directory / f.name)
+    return time.perf_counter() - start
+
+
+def generate(
+    model: Model,
+    directory: Path,
+    prefix: str = DEFAULT_PREFIX,
+    jobs: Optional[int] = None,
+) -> dict[ID, float]:
+    """
+    Generates SPARK code out of an in-memory `Model` into `directory`, with the
+    packages being generated concurrently by `jobs` processes.
+
+    Returns the time in seconds spent generating each package.
+    """
+    pkgs = packages(model.types)
+    res: dict[ID, float] = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        timings = executor.map(
+            generate_package,
+            pkgs.keys(),
+            pkgs.values(),
+            repeat(directory),
+            repeat(prefix),
+        )
+        for package, elapsed in zip(pkgs, timings):
+            logging.info(f"Generated package `{package}` in {elapsed:.2f}s")
+            res[package] = elapsed
+    # The library files and the top-level package are shared by all packages.
+    Generator(prefix).generate(Model(), Integration(), directory)
+    return res
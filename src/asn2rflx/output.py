@@ -0,0 +1,101 @@
+import hashlib
+import os
+import secrets
+import stat
+from pathlib import Path
+from typing import Optional, Union
+
+from rflx.common import unique
+from rflx.identifier import ID
+from rflx.model import Model, Type
+from rflx.model.package import Package
+from rflx.model.type_ import is_builtin_type, is_internal_type
+
+
+def _create_temporary(path: Path) -> tuple[int, Path]:
+    """
+    Creates a new file next to `path`, to be renamed to it once written.
+    Unlike with `tempfile.mkstemp`, the file gets the permissions of `open` (i.e.
+    those allowed by the umask), which is applied by the kernel.
+    """
+    while True:
+        tmp = path.parent / f".{path.name}.{secrets.token_hex(4)}"
+        try:
+            return os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), tmp
+        except FileExistsError:
+            continue
+
+
+def write_if_changed(path: Path, content: Union[str, bytes]) -> bool:
+    """
+    Writes `content` to `path`, unless the file already has the same content.
+    The file is replaced atomically, so that readers never see a partial write.
+
+    Returns whether the file has been written.
+    """
+    data = content.encode() if isinstance(content, str) else content
+    mode: Optional[int] = None
+    try:
+        if hashlib.sha256(path.read_bytes()).digest() == hashlib.sha256(data).digest():
+            return False
+        # Keep the permissions of the replaced file.
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        pass
+    fd, tmp = _create_temporary(path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+
+def sorted_types(types: list[Type]) -> list[Type]:
+    """
+    Sorts `types` by identifier, while keeping each type after its dependencies,
+    so that the resulting order does not depend on the order of conversion.
+    """
+    ordered = sorted(types, key=lambda t: str(t.identifier))
+    return list(unique(d for t in ordered for d in t.dependencies))
+
+
+def create_specifications(model: Model) -> dict[ID, str]:
+    """
+    Like `Model.create_specifications`, but with the types of each package in
+    a deterministic order.
+    """
+    pkgs: dict[ID, Package] = {}
+    for ty in sorted_types([*model.types]):
+        if not is_builtin_type(ty.name) and not is_internal_type(ty.name):
+            pkg = pkgs.setdefault(ty.package, Package(ty.package))
+            pkg.imports |= {dep.package for dep in ty.direct_dependencies}
+            pkg.types.append(ty)
+    for sess in model.sessions:
+        pkgs.setdefault(sess.package, Package(sess.package)).sessions.append(sess)
+    return {ident: str(pkgs[ident]) for ident in sorted(pkgs, key=str)}
+
+
+def write_specification_files(model: Model, output_dir: Path) -> list[Path]:
+    """
+    Like `Model.write_specification_files`, but deterministic, and only writing the
+    specification files whose content has changed, so that their modification time
+    (and thus incremental downstream builds) is preserved otherwise.
+
+    Returns the paths of the files that have been written.
+    """
+    res: list[Path] = []
+    for package, specification in create_specifications(model).items():
+        header = (
+            "-- style: disable = line-length\n\n"
+            if any(len(line) > 120 for line in specification.split("\n"))
+            else ""
+        )
+        path = output_dir / f"{package.flat.lower()}.rflx"
+        if write_if_changed(path, f"{header}{specification}"):
+            res.append(path)
+    return res
@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, unique
-from functools import lru_cache, reduce
-from typing import Mapping, Optional, Protocol, cast
+from functools import lru_cache, reduce, wraps
+from typing import Callable, Iterable, Mapping, Optional, Protocol, TypeVar, cast
 
 from asn1tools.codecs.ber import Tag as AsnTagNum
 from frozendict import frozendict
@@ -42,7 +42,6 @@ class AsnTag:
     )
 
     @classmethod
-    @lru_cache
     def ty(cls, skip_proof: bool = False) -> model.Type:
         """The ASN Tag message type in RecordFlux."""
         return simple_message(
@@ -88,6 +87,25 @@ class AsnRawBoolean(Enum):
     B_TRUE = 0xFF
 
 
+Materialization = TypeVar("Materialization", bound=Callable[..., model.Type])
+
+
+def memoized(method: Materialization) -> Materialization:
+    """
+    Memoizes a method materializing a `BerType` (e.g. `tlv_ty`) in the `TypeCache`
+    given to it, or in a new one for the duration of the call.
+    """
+
+    @wraps(method)
+    def wrapper(
+        self: "BerType", skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
+        cache = TypeCache() if cache is None else cache
+        return cache.materialize(self, method, skip_proof)
+
+    return cast(Materialization, wrapper)
+
+
 class BerType(Protocol):
     @property
     def path(self) -> str:
@@ -110,13 +128,21 @@ class BerType(Protocol):
             f"no tag definition found for type `{type(self)}`: got {self}"
         )
 
-    @lru_cache(1)
-    def v_ty(self, skip_proof: bool = False) -> model.Type:
+    @property
+    def direct_dependencies(self) -> tuple["BerType", ...]:
+        """The `BerType`s this type is directly composed of."""
+        return ()
+
+    def v_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
         """The `RAW` RecordFlux representation of this type."""
         return OPAQUE
 
-    @lru_cache
-    def lv_ty(self, skip_proof: bool = False) -> model.Type:
+    @memoized
+    def lv_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
         """The `Untagged`, length-value (LV) encoding of this type."""
         f = Field
         links = [
@@ -127,7 +153,7 @@ class BerType(Protocol):
         ]
         fields = {
             f("Length"): ASN_LENGTH_TY,
-            f("Value"): self.v_ty(skip_proof=skip_proof),
+            f("Value"): self.v_ty(skip_proof=skip_proof, cache=cache),
         }
         full_ident = strid(list(filter(None, [self.path, "Untagged_" + self.ident])))
         try:
@@ -139,15 +165,22 @@ class BerType(Protocol):
         except Exception as e:
             raise Asn2RflxError(f"invalid message detected: `{self}`") from e
 
-    @lru_cache
-    def tlv_ty(self, skip_proof: bool = False) -> model.Type:
-        """The tag-length-value (TLV) encoding of this type."""
-        lv_ty = self.lv_ty(skip_proof=skip_proof)
+    @memoized
+    def tlv_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
+        """
+        The tag-length-value (TLV) encoding of this type.
+
+        The types materialized along the way are memoized in `cache` (if given), so
+        that those shared with other `BerType`s are only materialized once.
+        """
+        lv_ty = self.lv_ty(skip_proof=skip_proof, cache=cache)
         f = Field
         try:
             tag_match = self.tag.matches("Tag")
         except NotImplementedError:
-            return self.v_ty(skip_proof=skip_proof)
+            return self.v_ty(skip_proof=skip_proof, cache=cache)
         links = [
             Link(INITIAL, f("Tag")),
             Link(f("Tag"), f("Untagged"), condition=tag_match),
@@ -182,7 +215,7 @@ class BerType(Protocol):
         It is equivalent to its regular TLV encoding nested in an implicitly-tagged,
         single-field `SEQUENCE` type.
         """
-        return SequenceBerType(
+        return ExplicitBerType(
             path,
             "Explicit_" + self.ident,
             # A `frozendict` is required here to comply with `lru_cache`.
@@ -223,15 +256,18 @@ class DefiniteBerType(SimpleBerType):
 
     _v_ty: model.Type
 
-    @lru_cache
-    def v_ty(self, skip_proof: bool = False) -> model.Type:
+    def v_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
         return self._v_ty
 
-    @lru_cache
-    def lv_ty(self, skip_proof: bool = False) -> model.Type:
+    @memoized
+    def lv_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
         """The `Untagged`, length-value (LV) encoding of this type."""
         f = Field
-        v_ty = self.v_ty(skip_proof=skip_proof)
+        v_ty = self.v_ty(skip_proof=skip_proof, cache=cache)
         links = [Link(INITIAL, f("Length"))]
         fields = {f("Length"): cast(model.Type, ASN_LENGTH_TY)}
         is_null_v_ty = isinstance(v_ty, model.AbstractMessage) and (
@@ -268,12 +304,18 @@ class SequenceBerType(BerType):
 
     fields: Mapping[str, BerType]
 
-    @lru_cache(1)
-    def v_ty(self, skip_proof: bool = False) -> model.Type:
+    @property
+    def direct_dependencies(self) -> tuple[BerType, ...]:
+        return tuple(self.fields.values())
+
+    @memoized
+    def v_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
         # A `SEQUENCE` is just a `message` of all its `root_members`.
         return simple_message(
             strid(self.full_ident),
-            {f: t.tlv_ty(skip_proof) for f, t in self.fields.items()},
+            {f: t.tlv_ty(skip_proof, cache) for f, t in self.fields.items()},
             skip_proof=skip_proof,
         )
 
@@ -282,6 +324,18 @@ class SequenceBerType(BerType):
         return AsnTag(form=AsnTagForm.CONSTRUCTED, num=AsnTagNum.SEQUENCE)
 
 
+@dataclass(frozen=True)
+class ExplicitBerType(SequenceBerType):
+    """
+    The single-field `SEQUENCE` wrapping the TLV encoding of another `BerType` in
+    an `EXPLICIT` tag (see `BerType.explicitly_tagged`).
+    """
+
+    @property
+    def inner(self) -> BerType:
+        return self.fields["Inner"]
+
+
 @dataclass(frozen=True)
 class SequenceOfBerType(BerType):
     _path: str
@@ -292,20 +346,28 @@ class SequenceOfBerType(BerType):
 
     @property
     def ident(self) -> str:
-        return "SEQUENCE_OF_" + self.elem_tlv_ty.name
+        return "SEQUENCE_OF_" + self.elem.ident
 
     @property
     def tag(self) -> AsnTag:
         return AsnTag(form=AsnTagForm.CONSTRUCTED, num=AsnTagNum.SEQUENCE)
 
-    elem_tlv_ty: model.Type
+    elem: BerType
 
-    @lru_cache
-    def v_ty(self, skip_proof: bool = False) -> model.Type:
+    @property
+    def direct_dependencies(self) -> tuple[BerType, ...]:
+        return (self.elem,)
+
+    @memoized
+    def v_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
         # A `SEQUENCE OF` is mapped directly to `sequence of`.
+        # The element type is only materialized here, so that building a
+        # `SequenceOfBerType` stays cheap.
         return model.Sequence(
             strid(list(filter(None, [self.path, "Asn_Raw_" + self.ident]))),
-            self.elem_tlv_ty,
+            self.elem.tlv_ty(skip_proof=skip_proof, cache=cache),
         )
 
 
@@ -325,9 +387,17 @@ class ChoiceBerType(BerType):
 
     variants: Mapping[str, BerType]
 
-    @lru_cache(1)
-    def v_ty(self, skip_proof: bool = False) -> model.Type:
-        variants: dict[str, tuple[AsnTag, model.Type]] = {}
+    @property
+    def direct_dependencies(self) -> tuple[BerType, ...]:
+        return tuple(self.variants.values())
+
+    @property
+    def flat_variants(self) -> dict[str, BerType]:
+        """
+        The variants of this type, where those of nested choices are flattened,
+        i.e. named `<outer variant>_<inner variant>`.
+        """
+        res: dict[str, BerType] = {}
 
         def populate_variants(f: str, t: BerType, prefix: str = "") -> None:
             pf = f"{prefix}_{f}" if prefix else f
@@ -337,14 +407,21 @@ class ChoiceBerType(BerType):
                 for f1, t1 in t.variants.items():
                     populate_variants(f1, t1, prefix=pf)
             else:
-                variants[pf] = (
-                    t.tag,
-                    t.lv_ty(skip_proof=skip_proof),
-                )
+                res[pf] = t
+
+        for f, t in self.variants.items():
+            populate_variants(f, t)
+        return res
 
+    @memoized
+    def v_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
         try:
-            for f, t in self.variants.items():
-                populate_variants(f, t)
+            variants = {
+                f: (t.tag, t.lv_ty(skip_proof=skip_proof, cache=cache))
+                for f, t in self.flat_variants.items()
+            }
             # A `CHOICE` is mapped to a tagged union message:
             # different tags expose different underlying values.
             return tagged_union_message(
@@ -393,11 +470,79 @@ class ImplicitlyTaggedBerType(BerType):
             prefix = "Priv"
         return f"{prefix}{self.tag.num:02}_{self.base.ident}"
 
-    def v_ty(self, skip_proof: bool = False) -> model.Type:  # type: ignore [override]
-        return self.base.v_ty(skip_proof=skip_proof)
+    @property
+    def direct_dependencies(self) -> tuple[BerType, ...]:
+        return (self.base,)
+
+    # Memoized as well, so that the base of a type proven elsewhere is not proven
+    # again (see `TypeCache.proven`).
+    @memoized
+    def v_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
+        return self.base.v_ty(skip_proof=skip_proof, cache=cache)
+
+    @memoized
+    def lv_ty(
+        self, skip_proof: bool = False, cache: Optional["TypeCache"] = None
+    ) -> model.Type:
+        return self.base.lv_ty(skip_proof=skip_proof, cache=cache)
+
+
+CacheKey = tuple[BerType, str, bool]
+"""
+The key of a type in a `TypeCache`: the `BerType` it has been materialized from,
+the materializing method (e.g. `tlv_ty`) and whether the proof has been skipped.
+"""
+
+
+@dataclass
+class TypeCache:
+    """
+    The RecordFlux types materialized from `BerType`s (see `BerType.tlv_ty`).
+
+    The cache belongs to whoever passes it to the materializing methods (e.g. a
+    `Session`): its types are released along with it.
+    """
+
+    types: dict[CacheKey, model.Type] = field(default_factory=dict)
+
+    proven: set[BerType] = field(default_factory=set)
+    """
+    The `BerType`s already proven elsewhere (e.g. by another process), whose types
+    are materialized without being proven again.
+    """
+
+    def materialize(
+        self,
+        ty: BerType,
+        method: Callable[[BerType, bool, "TypeCache"], model.Type],
+        skip_proof: bool,
+    ) -> model.Type:
+        """Returns the type materialized by `method` for `ty`, memoizing it."""
+        key = (ty, method.__name__, skip_proof)
+        if key not in self.types:
+            self.types[key] = method(ty, skip_proof or ty in self.proven, self)
+        return self.types[key]
 
-    def lv_ty(self, skip_proof: bool = False) -> model.Type:  # type: ignore [override]
-        return self.base.lv_ty(skip_proof=skip_proof)
+
+def postorder(roots: Iterable[BerType]) -> list[BerType]:
+    """
+    Returns all the `BerType`s reachable from `roots` (included), each type being
+    listed only once and after all of its dependencies.
+    """
+    res: dict[BerType, None] = {}
+
+    def visit(ty: BerType) -> None:
+        if ty in res:
+            return
+        for dep in ty.direct_dependencies:
+            visit(dep)
+        res[ty] = None
+
+    for root in roots:
+        visit(root)
+    return list(res)
 
 
 def simple_message(
@@ -517,9 +662,15 @@ BER_TYPES = [
 ]
 
 
-@lru_cache
+def prelude_types(
+    skip_proof: bool = False, cache: Optional[TypeCache] = None
+) -> list[model.Type]:
+    """The types of the base prelude, materialized in `cache` if given."""
+    return HELPER_TYPES + [
+        ty.tlv_ty(skip_proof=skip_proof, cache=cache) for ty in BER_TYPES
+    ]
+
+
 def prelude_model(skip_proof: bool = False) -> model.Model:
     """Base prelude without any structured types."""
-    return model.Model(
-        types=HELPER_TYPES + [ty.tlv_ty(skip_proof=skip_proof) for ty in BER_TYPES]
-    )
+    return model.Model(types=prelude_types(skip_proof=skip_proof))
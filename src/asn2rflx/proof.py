@@ -0,0 +1,111 @@
+import logging
+import multiprocessing as mp
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+from enum import Enum, unique
+from multiprocessing.connection import Connection
+from typing import Optional
+
+from rflx import model
+
+from asn2rflx.error import Asn2RflxError, ProofTimeoutError
+from asn2rflx.prelude import BerType, TypeCache
+
+
+@unique
+class ProofFallback(Enum):
+    """What to do when the proof of a type has timed out."""
+
+    SKIP = "skip"
+    """Skip the proof of this type and mark it as unproven."""
+
+    FAIL = "fail"
+    """Fail the whole conversion."""
+
+
+def prove(
+    ty: BerType, timeout: Optional[float] = None, cache: Optional[TypeCache] = None
+) -> model.Type:
+    """
+    Returns the proven `tlv_ty` of `ty`, adding the types materialized along the way
+    to `cache`.
+
+    The types already in `cache` are reused: when the dependencies of `ty` have
+    already been proven in it (see `AsnTypeConverter.materialization_order`), only
+    the messages of `ty` itself are proven.
+
+    If `timeout` is given, the proof is done in a separate process (group), with a
+    copy of `cache`, which is killed when the proof has not finished after `timeout`
+    seconds, in which case a `ProofTimeoutError` is raised. Otherwise, the types
+    materialized by this process are added to `cache`.
+    """
+    cache = TypeCache() if cache is None else cache
+    if timeout is None or (ty, "tlv_ty", False) in cache.types:
+        return ty.tlv_ty(skip_proof=False, cache=cache)
+
+    recv, send = mp.Pipe(duplex=False)
+    # RecordFlux uses a process pool for proofs, so the process cannot be a daemon.
+    proc = mp.Process(target=_prove_in_subprocess, args=(ty, cache, send))
+    proc.start()
+    send.close()
+    try:
+        if not recv.poll(timeout):
+            raise ProofTimeoutError(
+                f"proof of `{ty.full_ident}` timed out after {timeout}s"
+            )
+        error, types = recv.recv()
+    except EOFError as e:
+        raise Asn2RflxError(f"proof process of `{ty.full_ident}` died") from e
+    finally:
+        _kill(proc)
+    if error is not None:
+        raise Asn2RflxError(error)
+    cache.types.update(types)
+    return cache.types[(ty, "tlv_ty", False)]
+
+
+def _prove_in_subprocess(ty: BerType, cache: TypeCache, conn: Connection) -> None:
+    # Start a new process group, so that the proof workers can be killed with us.
+    os.setsid()
+    known = set(cache.types)
+    error: Optional[str] = None
+    try:
+        ty.tlv_ty(skip_proof=False, cache=cache)
+    except Exception as e:
+        error = f"{e}: {e.__cause__}" if e.__cause__ else str(e)
+    # Only send back the types materialized here.
+    conn.send((error, {k: v for k, v in cache.types.items() if k not in known}))
+
+
+def _kill(proc: mp.Process) -> None:
+    if proc.pid is not None and proc.is_alive():
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            # The process group might not have been created yet.
+            proc.kill()
+    proc.join()
+
+
+@dataclass
+class Progress:
+    """A progress reporter of a conversion, logging an ETA for each step."""
+
+    total: int
+
+    done: int = 0
+
+    start: float = field(default_factory=time.monotonic)
+
+    def advance(self, what: str) -> None:
+        """Marks `what` as done and logs the current progress."""
+        self.done += 1
+        remaining = self.total - self.done
+        elapsed = time.monotonic() - self.start
+        eta = elapsed / self.done * remaining
+        logging.info(
+            f"[{self.done}/{self.total}] `{what}` done, {remaining} remaining "
+            f"(elapsed {elapsed:.1f}s, ETA {eta:.1f}s)"
+        )
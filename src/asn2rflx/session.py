@@ -0,0 +1,197 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Hashable, Iterable, Optional, Sequence
+
+import asn1tools as asn1
+from rflx import model
+from rflx.identifier import ID
+
+from asn2rflx import prelude
+from asn2rflx.assemble import assemble
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.distributed import Coordinator
+
+SpecKey = tuple[Hashable, ...]
+"""The key identifying a compiled ASN.1 specification in a `Session`."""
+
+
+def parallel_compile_files(
+    files: Sequence[str], jobs: Optional[int] = None
+) -> asn1.compiler.Specification:
+    """
+    Like `asn1.compile_files`, but with the files parsed concurrently by `jobs`
+    processes (defaults to the number of CPUs). The parsed modules are then merged
+    and resolved together, so the files can still refer to each other.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(files))
+    if jobs < 2:
+        return asn1.compile_files(list(files))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        parsed = list(executor.map(asn1.parse_files, files))
+    modules: dict = {}
+    for p in parsed:
+        modules.update(p)
+    return asn1.compile_dict(modules)
+
+
+@dataclass
+class Session:
+    """
+    A conversion session.
+
+    A session owns the state shared by its conversions: the compiled ASN.1
+    specifications, the RecordFlux types materialized from each specification (see
+    `prelude.TypeCache`), and the prelude. Converting the same (unchanged)
+    specification again in the same session only materializes the types that have
+    not been materialized yet.
+
+    This state is released along with the session, or by `invalidate`.
+    """
+
+    converter: AsnTypeConverter = field(default_factory=AsnTypeConverter)
+    """The converter used by this session."""
+
+    coordinator: Optional[Coordinator] = None
+    """
+    If given, the coordinator distributing the proofs of the conversions to workers.
+    Its converter should be the one of this session.
+    """
+
+    jobs: Optional[int] = None
+    """
+    The number of processes parsing the ASN.1 files (defaults to the number of
+    CPUs).
+    """
+
+    _specs: dict[SpecKey, asn1.compiler.Specification] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    _stores: dict[SpecKey, dict[str, model.Type]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    _caches: dict[SpecKey, prelude.TypeCache] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    _prelude_cache: prelude.TypeCache = field(
+        default_factory=prelude.TypeCache, init=False, repr=False
+    )
+    """The types of the prelude, which the caches of the specifications start from."""
+
+    _prelude: Optional[model.Model] = field(default=None, init=False, repr=False)
+
+    @property
+    def prelude(self) -> model.Model:
+        """The prelude of this session."""
+        if self._prelude is None:
+            self._prelude = model.Model(types=self.__prelude_types())
+        return self._prelude
+
+    def compile_files(self, files: Sequence[str]) -> asn1.compiler.Specification:
+        """
+        Compiles the given ASN.1 files, or returns the cached specification if none
+        of them has changed since the last compilation.
+        """
+        return self._specs[self.__compile_files(files)]
+
+    def compile_text(self, text: str) -> asn1.compiler.Specification:
+        """
+        Compiles the given ASN.1 source, or returns the cached specification if it
+        has already been compiled.
+        """
+        return self._specs[self.__compile_text(text)]
+
+    def convert_files(
+        self, files: Sequence[str], roots: Optional[Iterable[str]] = None
+    ) -> dict[ID, model.Type]:
+        """Converts the given ASN.1 files. See `AsnTypeConverter.convert_spec`."""
+        return self.__convert(self.__compile_files(files), roots)
+
+    def convert_text(
+        self, text: str, roots: Optional[Iterable[str]] = None
+    ) -> dict[ID, model.Type]:
+        """Converts the given ASN.1 source. See `AsnTypeConverter.convert_spec`."""
+        return self.__convert(self.__compile_text(text), roots)
+
+    def assemble(
+        self, types: Iterable[model.Type], full_validation: bool = False
+    ) -> model.Model:
+        """
+        Returns the model made of the prelude and the given converted `types`.
+
+        The types are added to the already validated prelude without redoing the
+        whole-model checks (see `assemble.assemble`), unless `full_validation` is set.
+        """
+        if full_validation:
+            return model.Model(types=[*self.prelude.types, *types])
+        return assemble(self.prelude, types)
+
+    def invalidate(self, module: Optional[str] = None) -> None:
+        """
+        Forgets about the compiled specifications containing the given ASN.1 module,
+        and releases the types materialized from them.
+        If no module is given, everything is forgotten.
+        """
+        for key, spec in list(self._specs.items()):
+            if module is None or module in spec.modules:
+                self.__forget(key)
+        if module is None:
+            self._prelude_cache = prelude.TypeCache()
+            self._prelude = None
+
+    def __prelude_types(self) -> list[model.Type]:
+        return prelude.prelude_types(
+            skip_proof=self.converter.skip_proof, cache=self._prelude_cache
+        )
+
+    def __compile_files(self, files: Sequence[str]) -> SpecKey:
+        paths = tuple(str(Path(f).resolve()) for f in files)
+        stats = tuple(
+            (s.st_mtime_ns, s.st_size) for s in (Path(p).stat() for p in paths)
+        )
+        key: SpecKey = ("files", paths, stats)
+        if key not in self._specs:
+            # Forget about the previous versions of the same files.
+            for k in [k for k in self._specs if k[:2] == key[:2]]:
+                self.__forget(k)
+            self._specs[key] = parallel_compile_files(paths, self.jobs)
+        return key
+
+    def __compile_text(self, text: str) -> SpecKey:
+        key: SpecKey = ("text", hashlib.sha256(text.encode()).hexdigest())
+        if key not in self._specs:
+            self._specs[key] = asn1.compile_string(text)
+        return key
+
+    def __forget(self, key: SpecKey) -> None:
+        if (spec := self._specs.pop(key, None)) is not None:
+            self.converter.unproven -= {
+                name
+                for name in self.converter.unproven
+                if name.rsplit(".", 1)[0] in spec.modules
+            }
+        self._stores.pop(key, None)
+        self._caches.pop(key, None)
+
+    def __convert(
+        self, key: SpecKey, roots: Optional[Iterable[str]]
+    ) -> dict[ID, model.Type]:
+        store = self._stores.setdefault(key, {})
+        if (cache := self._caches.get(key)) is None:
+            # The prelude is only materialized (and proven) once per session.
+            self.__prelude_types()
+            cache = self._caches[key] = prelude.TypeCache(
+                types=dict(self._prelude_cache.types)
+            )
+        if self.coordinator:
+            self.coordinator.prove_spec(
+                self._specs[key], roots=roots, store=store, cache=cache
+            )
+        return self.converter.convert_spec(
+            self._specs[key], roots=roots, store=store, cache=cache
+        )
@@ -0,0 +1,173 @@
+"""
+Incremental validation of live BER traffic against the converted types.
+
+The messages are framed out of `asyncio` streams with the `Tag`/`Length` structure
+modelled by `BerType.tlv_ty`, so that many connections can be served by a single
+event loop.
+"""
+
+import asyncio
+import contextlib
+import logging
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union, cast
+
+from rflx.identifier import ID
+from rflx.model import Model
+
+from asn2rflx import prelude
+from asn2rflx.error import Asn2RflxError
+
+Validator = Callable[[bytes], Any]
+"""A function validating a complete BER message, raising an exception if invalid."""
+
+
+async def read_tlv(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """
+    Reads the next complete TLV out of `reader`, waiting for its missing parts.
+
+    Returns `None` if the stream has ended right before a TLV.
+    """
+    try:
+        header = await reader.readexactly(2)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise Asn2RflxError("truncated TLV header at end of stream") from e
+    tag, length = header
+    if tag & 0x1F == 0x1F:
+        raise Asn2RflxError(f"unsupported long tag 0x{tag:02x}")
+    if length > cast(int, prelude.ASN_LENGTH_TY.last.value):
+        raise Asn2RflxError(f"unsupported long length 0x{length:02x}")
+    try:
+        return header + await reader.readexactly(length)
+    except asyncio.IncompleteReadError as e:
+        raise Asn2RflxError(
+            f"truncated TLV at end of stream ({len(e.partial)}/{length} bytes)"
+        ) from e
+
+
+def pyrflx_validator(model: Model, message: Union[str, ID]) -> Validator:
+    """
+    Returns a `Validator` parsing the messages with the PyRFLX `MessageValue` of the
+    `message` type in `model`.
+
+    PyRFLX is only loaded on the first validated message, as it is costly to set up.
+    """
+    template: Any = None
+
+    def validate(data: bytes) -> None:
+        nonlocal template
+        if template is None:
+            from rflx.pyrflx import PyRFLX
+
+            ident = ID(message)
+            template = PyRFLX(model=model).package(ident.parent).new_message(ident.name)
+        msg = template.clone()
+        msg.parse(data)
+        if not msg.valid_message:
+            raise Asn2RflxError(f"invalid `{message}` message")
+
+    return validate
+
+
+@dataclass
+class StreamStats:
+    """Counters of a `StreamValidator`."""
+
+    connections: int = 0
+    active: int = 0
+    """The number of connections still being read."""
+    messages: int = 0
+    """The number of messages that went through the validator, even invalid ones."""
+    invalid: int = 0
+    """The number of messages rejected by the validator."""
+    framing_errors: int = 0
+    """The number of connections closed because of an unframeable input."""
+    lost: int = 0
+    """The number of connections lost while being read (e.g. reset by the peer)."""
+
+
+@dataclass
+class StreamValidator:
+    """
+    Validates the BER messages received on many streams.
+
+    The connections are framed concurrently with `handle` (e.g. as the callback of
+    `asyncio.start_server`) and the framed messages are validated by a fixed number
+    of `workers` tasks. The pending messages are kept in a queue of `max_pending`
+    items: when it is full, the connections stop being read, and the transport
+    propagates the backpressure to the peers.
+
+    The validator runs in the event loop unless an `executor` is given.
+    """
+
+    validate: Validator
+    workers: int = 4
+    max_pending: int = 1024
+    executor: Optional[Executor] = None
+    on_invalid: Optional[Callable[[bytes, Exception], None]] = None
+    """Called with each invalid message and the exception raised by the validator."""
+    stats: StreamStats = field(default_factory=StreamStats, init=False)
+
+    _queue: "asyncio.Queue[bytes]" = field(init=False, repr=False)
+    _tasks: list["asyncio.Task[None]"] = field(default_factory=list, init=False)
+
+    async def __aenter__(self) -> "StreamValidator":
+        self._queue = asyncio.Queue(self.max_pending)
+        self._tasks = [asyncio.create_task(self.__work()) for _ in range(self.workers)]
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def join(self) -> None:
+        """Waits until all the messages framed so far have been validated."""
+        await self._queue.join()
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: Optional[asyncio.StreamWriter] = None,
+    ) -> None:
+        """Frames the messages of a stream until it ends, queueing them."""
+        self.stats.connections += 1
+        self.stats.active += 1
+        try:
+            while (data := await read_tlv(reader)) is not None:
+                await self._queue.put(data)
+        except Asn2RflxError as e:
+            self.stats.framing_errors += 1
+            logging.warning(f"Closing connection: {e}")
+        except OSError as e:
+            # Like the end of the stream, but without the remaining messages.
+            self.stats.lost += 1
+            logging.info(f"Connection lost: {e}")
+        finally:
+            self.stats.active -= 1
+            if writer:
+                writer.close()
+                with contextlib.suppress(OSError):
+                    await writer.wait_closed()
+
+    async def __work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            data = await self._queue.get()
+            try:
+                if self.executor:
+                    await loop.run_in_executor(self.executor, self.validate, data)
+                else:
+                    self.validate(data)
+            except Exception as e:
+                self.stats.invalid += 1
+                if self.on_invalid:
+                    self.on_invalid(data, e)
+            finally:
+                self.stats.messages += 1
+                self._queue.task_done()
@@ -1,4 +1,7 @@
-from typing import Any, Sequence, Union
+import logging
+from typing import Any, Optional, Sequence, Union
+
+import coloredlogs
 
 from rflx.identifier import ID
 
@@ -14,3 +17,15 @@ def strid(ident: Union[str, Sequence[str], ID]) -> str:
 def from_asn1_name(ident: str) -> str:
     "Converts an ASN.1 identifier to an Ada one."
     return ident.replace("-", "_")
+
+
+def init_logging(verbosity: Optional[int]) -> None:
+    "Sets up logging according to the `-v` count given on the command line."
+    level = {
+        1: logging.ERROR,
+        2: logging.WARNING,
+        3: logging.INFO,
+        4: logging.DEBUG,
+    }.get(verbosity or 0, logging.INFO)
+    logging.basicConfig(level=level)
+    coloredlogs.install()
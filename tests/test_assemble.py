@@ -0,0 +1,31 @@
+import pytest
+from asn2rflx.assemble import assemble
+from asn2rflx.session import Session
+from rflx.error import RecordFluxError
+from rflx.model import Model
+
+ASSETS = "assets/"
+
+
+@pytest.mark.parametrize(
+    "files",
+    [["foo.asn"], ["tagged.asn", "rocket_mod.asn"], ["rfc1155.asn", "rfc1157.asn"]],
+)
+def test_assemble(files: list[str]) -> None:
+    session = Session()
+    types = session.convert_files([ASSETS + f for f in files]).values()
+
+    expected = Model(types=[*session.prelude.types, *types])
+    got = session.assemble(types)
+    assert [t.identifier for t in got.types] == [t.identifier for t in expected.types]
+    assert got.create_specifications() == expected.create_specifications()
+    assert session.assemble(types, full_validation=True).types == expected.types
+
+
+def test_assemble_conflict() -> None:
+    session = Session()
+    [question, answer] = session.convert_files([ASSETS + "foo.asn"]).values()
+    with pytest.raises(RecordFluxError, match='name conflict for type "Foo::Question"'):
+        assemble(
+            session.prelude, [question, answer.copy(identifier=question.identifier)]
+        )
@@ -0,0 +1,87 @@
+import json
+import logging
+from pathlib import Path
+
+import pytest
+from asn2rflx.bench import (
+    SYNTHETIC_SPECS,
+    Construct,
+    bench_spec,
+    breakdown,
+    constructs,
+    main,
+)
+from asn2rflx.session import Session
+
+
+def test_constructs() -> None:
+    session = Session()
+    graph = {
+        name: ty
+        for text in SYNTHETIC_SPECS.values()
+        for name, ty in session.converter.convert_ber_spec(
+            session.compile_text(text)
+        ).items()
+    }
+    assert {name: constructs(ty) for name, ty in graph.items()} == {
+        "Synthetic-Flat.Flat": set(),
+        "Synthetic-Choice.Choice": {Construct.CHOICE},
+        "Synthetic-Choice.NestedChoice": {Construct.CHOICE, Construct.NESTED_CHOICE},
+        "Synthetic-Sequence-Of.Integers": {Construct.SEQUENCE_OF},
+        "Synthetic-Sequence-Of.Pairs": {Construct.SEQUENCE_OF},
+        "Synthetic-Tagged.Implicit": {Construct.IMPLICIT_TAG},
+        "Synthetic-Tagged.Explicit": {Construct.EXPLICIT_TAG},
+    }
+
+
+def test_bench_spec() -> None:
+    session = Session()
+    spec = session.compile_text(SYNTHETIC_SPECS["Synthetic-Choice"])
+    results = bench_spec(session, spec, 10, parser="asn1tools", min_time=0.01)
+    assert [r.name for r in results] == [
+        "Synthetic-Choice.Choice",
+        "Synthetic-Choice.NestedChoice",
+    ]
+    for r in results:
+        assert r.emission == "merged"
+        assert r.messages >= 10 and r.messages % 10 == 0
+        assert r.messages_per_s > 0 and r.bytes_per_s > 0
+
+    with_, without = breakdown(results)[Construct.NESTED_CHOICE.value]
+    assert with_ > 0 and without > 0
+    assert breakdown(results)[Construct.SEQUENCE_OF.value][0] == 0.0
+
+
+def test_bench_main(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO)
+    out = tmp_path / "bench.json"
+    main(
+        [
+            "--parser=asn1tools",
+            "--min-time=0.01",
+            "-n5",
+            f"--json={out}",
+            "assets/foo.asn",
+        ]
+    )
+    assert [r["name"] for r in json.loads(out.read_text())] == [
+        "Foo.Question",
+        "Foo.Answer",
+    ]
+    # The results are logged as a table after the progress of the benchmark.
+    rows = [m[:40].rstrip() for m in caplog.messages]
+    assert rows[rows.index("type") :] == [
+        "type",
+        "Foo.Question",
+        "Foo.Answer",
+        "construct",
+        *(c.value for c in Construct),
+    ]
+
+
+def test_bench_pyrflx() -> None:
+    pytest.importorskip("rflx.pyrflx")
+    session = Session()
+    spec = session.compile_text(SYNTHETIC_SPECS["Synthetic-Flat"])
+    [result] = bench_spec(session, spec, 5, parser="pyrflx", min_time=0.01)
+    assert result.messages_per_s > 0
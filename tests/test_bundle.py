@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+import rflx
+from asn2rflx.bundle import MAGIC, Bundle, read_bundle, write_bundle
+from asn2rflx.error import Asn2RflxError
+from asn2rflx.session import Session
+
+ASSETS = "assets/"
+
+
+def rocket_bundle() -> Bundle:
+    session = Session()
+    files = [ASSETS + "rocket_mod.asn"]
+    model = session.assemble(session.convert_files(files).values())
+    graph = session.converter.convert_reachable(session.compile_files(files))
+    return Bundle.create(model, graph)
+
+
+def test_bundle_roundtrip(tmp_path: Path) -> None:
+    bundle = rocket_bundle()
+    path = write_bundle(bundle, tmp_path)
+    assert path is not None
+    assert write_bundle(bundle, tmp_path) is None
+
+    loaded = read_bundle(path)
+    assert [t.identifier for t in loaded.types] == [t.identifier for t in bundle.types]
+    assert loaded.model.create_specifications() == bundle.model.create_specifications()
+    assert loaded.info == bundle.info
+    assert loaded.graph == bundle.graph
+
+    rocket = loaded.info["World-Schema.Rocket"]
+    assert str(rocket.identifier) == "World_Schema::Rocket"
+    assert rocket.tag == 0x30
+    assert rocket.choices == {"Untagged_Value_payload_": {0x02: "one", 0x30: "many"}}
+    assert "Untagged_Value_payload_many_Value" in rocket.fields
+
+
+def test_bundle_header(monkeypatch: pytest.MonkeyPatch) -> None:
+    data = rocket_bundle().dumps()
+    assert data.startswith(MAGIC)
+
+    with pytest.raises(Asn2RflxError, match="truncated"):
+        Bundle.loads(data[:4])
+    with pytest.raises(Asn2RflxError, match="not an asn2rflx bundle"):
+        Bundle.loads(b"X" + data[1:])
+    with pytest.raises(Asn2RflxError, match="unsupported bundle format version 2"):
+        Bundle.loads(data[:8] + b"\x00\x02" + data[10:])
+    monkeypatch.setattr(rflx, "__version__", "0.0.0")
+    with pytest.raises(Asn2RflxError, match="bundle written with RecordFlux"):
+        Bundle.loads(data)
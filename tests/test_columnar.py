@@ -0,0 +1,91 @@
+import random
+
+import asn1tools as asn1
+import pytest
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.corpus import AsnValueGenerator
+from asn2rflx.error import Asn2RflxError
+
+np = pytest.importorskip("numpy")
+
+from asn2rflx.columnar import extract, field_paths, integers  # noqa: E402
+
+ASSETS = "assets/"
+
+
+def ber_graph(files: list[str]):  # type: ignore[no-untyped-def]
+    spec = asn1.compile_files([ASSETS + f for f in files])
+    return spec, AsnTypeConverter(skip_proof=True).convert_ber_spec(spec)
+
+
+@pytest.mark.parametrize("files", [["foo.asn"], ["rocket_mod.asn"], ["tagged.asn"]])
+def test_field_paths(files: list[str]) -> None:
+    _, graph = ber_graph(files)
+    for ty in graph.values():
+        expected = {f.name for f in ty.tlv_ty(skip_proof=True).fields}
+        assert set(field_paths(ty)) == expected
+
+
+def test_extract_rocket() -> None:
+    spec, graph = ber_graph(["rocket_mod.asn"])
+    ty = spec.modules["World-Schema"]["Rocket"]
+    gen = AsnValueGenerator(random.Random(0), max_size=7)
+    values = [gen.generate(ty.type) for _ in range(50)]
+    buffer = b"".join(ty.encode(v) for v in values)
+
+    prefix = "Untagged_Value_"
+    paths = [
+        f"{prefix}range_Untagged_Value",
+        f"{prefix}name_Untagged_Value",
+        f"{prefix}payload_Tag_Num",
+        f"{prefix}payload_one_Value",
+    ]
+    cols = extract(graph["World-Schema.Rocket"], buffer, paths)
+
+    ranges = integers(buffer, cols[paths[0]])
+    assert ranges.tolist() == [v["range"] for v in values]
+
+    names = cols[paths[1]]
+    assert names.present.all()
+    assert [
+        buffer[o : o + n]
+        for o, n in zip(names.offsets.tolist(), names.lengths.tolist())
+    ] == [v["name"] for v in values]
+
+    is_one = [v["payload"][0] == "one" for v in values]
+    assert cols[paths[2]].values.tolist() == [2 if b else 16 for b in is_one]
+    assert cols[paths[3]].present.tolist() == is_one
+    assert integers(buffer, cols[paths[3]]).tolist() == [
+        v["payload"][1] if b else 0 for v, b in zip(values, is_one)
+    ]
+
+
+def test_extract_tagged() -> None:
+    spec, graph = ber_graph(["tagged.asn"])
+    ty = spec.modules["Tagged-Test"]["Tagged"]
+    gen = AsnValueGenerator(random.Random(1), max_size=7)
+    values = [gen.generate(ty.type) for _ in range(50)]
+    buffer = b"".join(ty.encode(v) for v in values)
+
+    prefix = "Untagged_Value_payload_"
+    paths = [f"{prefix}aip_Value", f"{prefix}cep_Value_Inner_Untagged_Value"]
+    cols = extract(graph["Tagged-Test.Tagged"], buffer, paths)
+    for path, variant in zip(paths, ["aip", "cep"]):
+        selected = [v["payload"][0] == variant for v in values]
+        assert cols[path].present.tolist() == selected
+        assert integers(buffer, cols[path]).tolist() == [
+            v["payload"][1] if b else 0 for v, b in zip(values, selected)
+        ]
+
+
+def test_extract_errors() -> None:
+    spec, graph = ber_graph(["foo.asn"])
+    question = graph["Foo.Question"]
+    data = spec.encode("Question", {"id": 1, "question": "?"})
+
+    with pytest.raises(Asn2RflxError, match="unknown field paths"):
+        extract(question, data, ["Untagged_Value_foo_Untagged_Value"])
+    with pytest.raises(Asn2RflxError, match="unexpected tag"):
+        extract(question, b"\x31" + data[1:], ["Tag_Num"])
+    with pytest.raises(Asn2RflxError, match="truncated message"):
+        extract(question, data[:-1], ["Tag_Num"])
@@ -23,6 +23,32 @@ ASN_SHORT_IA5STRINGS = strats.text(
 )
 ASN_SHORT_OCTET_STRINGS = strats.text(max_size=ASN_SHORT_LEN)
 
+Converted = tuple[asn1.compiler.Specification, PyRFLX]
+
+
+def convert_proven(file: str) -> Converted:
+    """Compiles `file` and converts it with proofs, for PyRFLX."""
+    spec = asn1.compile_files(ASSETS + file)
+    types = AsnTypeConverter(skip_proof=False).convert_spec(spec).values()
+    # pprint({str(ty) for ty in types})
+    return spec, PyRFLX(model=Model(types=[*types]))
+
+
+# The proven conversions are shared by all the examples of each test.
+@pytest.fixture(scope="module")
+def foo() -> Converted:
+    return convert_proven("foo.asn")
+
+
+@pytest.fixture(scope="module")
+def rocket() -> Converted:
+    return convert_proven("rocket_mod.asn")
+
+
+@pytest.fixture(scope="module")
+def tagged() -> Converted:
+    return convert_proven("tagged.asn")
+
 
 # TODO: Support long lengths here.
 @hypot.given(id=ASN_SHORT_INTS, question=ASN_SHORT_IA5STRINGS)
@@ -30,15 +56,11 @@ ASN_SHORT_OCTET_STRINGS = strats.text(max_size=ASN_SHORT_LEN)
 @hypot.settings(deadline=None)
 @pytest.mark.xdist_group(name="foo")
 def test_foo_decode(
+    foo: Converted,
     id: int,
     question: str,
 ) -> None:
-    foo_spec = asn1.compile_files(ASSETS + "foo.asn")
-    foo = AsnTypeConverter(skip_proof=False).convert_spec(foo_spec)
-
-    types = foo.values()
-    # pprint({str(ty) for ty in types})
-    model = PyRFLX(model=Model(types=[*types]))
+    foo_spec, model = foo
     pkg = model.package("Foo")
 
     (expected := pkg.new_message("Question")).parse(
@@ -67,16 +89,12 @@ def test_foo_decode(
 @hypot.settings(deadline=None)
 @pytest.mark.xdist_group(name="rocket")
 def test_rocket_decode(
+    rocket: Converted,
     range: int,
     name: str,
     payload: Union[int, list[int]],
 ) -> None:
-    rocket_spec = asn1.compile_files(ASSETS + "rocket_mod.asn")
-    rocket = AsnTypeConverter(skip_proof=False).convert_spec(rocket_spec)
-
-    types = rocket.values()
-    # pprint({str(ty) for ty in types})
-    model = PyRFLX(model=Model(types=[*types]))
+    rocket_spec, model = rocket
     pkg = model.package("World_Schema")
 
     name1 = name.encode()
@@ -121,16 +139,12 @@ def test_rocket_decode(
 @hypot.settings(deadline=None)
 @pytest.mark.xdist_group(name="tagged")
 def test_tagged_decode(
+    tagged: Converted,
     name: str,
     variant: str,
     payload: Union[int, list[int]],
 ) -> None:
-    tagged_spec = asn1.compile_files(ASSETS + "tagged.asn")
-    tagged = AsnTypeConverter(skip_proof=False).convert_spec(tagged_spec)
-
-    types = tagged.values()
-    # pprint({str(ty) for ty in types})
-    model = PyRFLX(model=Model(types=[*types]))
+    tagged_spec, model = tagged
     pkg = model.package("Tagged_Test")
 
     name1 = name.encode()
@@ -0,0 +1,107 @@
+import random
+from copy import deepcopy
+from pathlib import Path
+
+import asn1tools as asn1
+import pytest
+from asn2rflx.corpus import (
+    AsnValueGenerator,
+    is_short_form,
+    read_corpus,
+    write_corpus,
+)
+
+ASSETS = "assets/"
+
+CONSTRAINED_ASN = """
+Constrained DEFINITIONS ::= BEGIN
+    Small ::= INTEGER (-5..-1 | 7 | 300..MAX, ...)
+    Sizes ::= SEQUENCE {
+        fixed OCTET STRING (SIZE (4)),
+        text IA5String (SIZE (2..MAX)),
+        small Small,
+        items SEQUENCE (SIZE (1..2)) OF INTEGER (0..9)
+    }
+    Tagged ::= CHOICE { a [0] EXPLICIT Small, b [1] IMPLICIT Sizes }
+END
+"""
+
+
+def test_is_short_form() -> None:
+    assert is_short_form(b"")
+    assert is_short_form(b"\x30\x03\x02\x01\x00")
+    # Long length.
+    assert not is_short_form(b"\x04\x81\x80" + b"\x00" * 0x80)
+    # Long tag.
+    assert not is_short_form(b"\x1f\x20\x00")
+    # Truncated TLV.
+    assert not is_short_form(b"\x30\x03\x02\x02\x00")
+
+
+@pytest.mark.parametrize(
+    "files",
+    [
+        ["foo.asn"],
+        ["rocket_mod.asn"],
+        ["tagged.asn"],
+        ["rfc1155.asn", "rfc1157.asn"],
+    ],
+)
+def test_generated_messages_roundtrip(files: list[str]) -> None:
+    spec = asn1.compile_files([ASSETS + f for f in files])
+    gen = AsnValueGenerator(random.Random(0))
+    for tys in spec.modules.values():
+        for ty in tys.values():
+            for _ in range(20):
+                value = gen.generate(ty.type)
+                data = ty.encode(value)
+                assert ty.decode(data) == value
+            messages = gen.messages(ty)
+            assert all(is_short_form(next(messages)) for _ in range(20))
+
+
+def test_write_corpus(tmp_path: Path) -> None:
+    files = [ASSETS + "rfc1155.asn", ASSETS + "rfc1157.asn"]
+    paths = write_corpus(files, tmp_path, 25, roots=["Message"], jobs=2, chunk_size=10)
+    assert paths == [tmp_path / "RFC1157-SNMP.Message.corpus"]
+
+    data = paths[0].read_bytes()
+    messages = list(read_corpus(data))
+    assert len(messages) == 25
+    spec = asn1.compile_files(files)
+    for msg in messages:
+        assert is_short_form(msg)
+        spec.decode("Message", msg)
+
+    # The output is reproducible for a given seed.
+    write_corpus(files, tmp_path, 25, roots=["Message"], jobs=2, chunk_size=10)
+    assert paths[0].read_bytes() == data
+
+
+@pytest.mark.parametrize(
+    "files",
+    [
+        ["rfc1155.asn", "rfc1157.asn"],
+        [],
+    ],
+)
+def test_generated_values_constraints(files: list[str]) -> None:
+    if files:
+        modules = asn1.parse_files([ASSETS + f for f in files])
+    else:
+        modules = asn1.parse_string(CONSTRAINED_ASN)
+    spec = asn1.compile_dict(deepcopy(modules))
+    gen = AsnValueGenerator(random.Random(0), modules=modules)
+    unconstrained = AsnValueGenerator(random.Random(0))
+    violations = 0
+    for tys in spec.modules.values():
+        for ty in tys.values():
+            messages = gen.messages(ty)
+            for _ in range(50):
+                ty.check_constraints(ty.decode(next(messages)))
+                try:
+                    ty.check_constraints(unconstrained.generate(ty.type))
+                except asn1.ConstraintsError:
+                    violations += 1
+    # Otherwise, the constraints are not exercised.
+    assert violations
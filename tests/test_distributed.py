@@ -0,0 +1,172 @@
+import logging
+import multiprocessing as mp
+import time
+from collections import Counter
+from pathlib import Path
+
+import asn1tools as asn1
+import pytest
+from asn2rflx import prelude
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.distributed import (
+    Coordinator,
+    Job,
+    JobQueue,
+    JobResult,
+    main,
+    run_worker,
+)
+from asn2rflx.error import Asn2RflxError
+from asn2rflx.session import Session
+from rflx.model import Message, UnprovenMessage
+
+ASSETS = "assets/"
+
+DEP_ASN = """
+Dep DEFINITIONS ::= BEGIN
+    Inner ::= SEQUENCE { id INTEGER }
+    Outer ::= SEQUENCE { inner Inner, ok BOOLEAN }
+END
+"""
+
+
+def start_workers(queue: JobQueue, count: int) -> list[mp.Process]:
+    workers = [
+        mp.Process(target=run_worker, args=(queue, f"w{i}", 0.05)) for i in range(count)
+    ]
+    for w in workers:
+        w.start()
+    return workers
+
+
+def stop_workers(queue: JobQueue, workers: list[mp.Process]) -> None:
+    queue.stop()
+    for w in workers:
+        w.join(30)
+        assert w.exitcode == 0
+
+
+def test_job_queue_lease_expiry(tmp_path: Path) -> None:
+    queue = JobQueue(tmp_path)
+    graph = AsnTypeConverter().convert_ber_spec(asn1.compile_files(ASSETS + "foo.asn"))
+    job = Job("Foo.Question", graph["Foo.Question"], None, lease_timeout=0.2)
+    queue.submit("run-000000", job)
+
+    leased = queue.lease("dead")
+    assert leased is not None and leased[1] == job
+    assert queue.lease("other") is None
+    assert queue.requeue_expired() == []
+
+    # The worker has died without completing the job.
+    time.sleep(0.5)
+    assert queue.requeue_expired() == ["run-000000"]
+    assert not queue.heartbeat(leased[0])
+    leased = queue.lease("other")
+    assert leased is not None
+
+    queue.complete(leased[0], JobResult(job.name, error="oops"))
+    assert list(queue.results("run")) == [
+        ("run-000000", JobResult(job.name, error="oops"))
+    ]
+    assert not any(queue.leased.iterdir())
+
+
+def test_job_queue_stop_resume(tmp_path: Path) -> None:
+    queue = JobQueue(tmp_path)
+    main(["--stop", str(tmp_path)])
+    assert queue.stopped
+    assert run_worker(queue, "w0") == 0
+
+    main(["--resume", str(tmp_path)])
+    assert not queue.stopped
+    assert run_worker(queue, "w0", 0.05, idle_timeout=0.1) == 0
+
+
+def test_coordinator_without_workers(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    queue = JobQueue(tmp_path)
+    queue.stop()
+    coordinator = Coordinator(
+        queue,
+        AsnTypeConverter(skip_proof=False),
+        lease_timeout=0.2,
+        poll_interval=0.05,
+        deadline=1.0,
+    )
+    with caplog.at_level(logging.WARNING):
+        with pytest.raises(Asn2RflxError, match="not finished after 1.0 s"):
+            coordinator.prove_spec(asn1.compile_files(ASSETS + "foo.asn"))
+    assert "is an `asn2rflx worker` running" in caplog.text
+    # The workers started later are not stopped, and the jobs are withdrawn.
+    assert not queue.stopped
+    assert not any(queue.pending.iterdir())
+
+
+@pytest.mark.xdist_group(name="foo")
+def test_coordinator(tmp_path: Path) -> None:
+    queue = JobQueue(tmp_path / "queue")
+    workers = start_workers(queue, 3)
+    try:
+        foo_spec = asn1.compile_files(ASSETS + "foo.asn")
+        converter = AsnTypeConverter(skip_proof=False)
+        store = Coordinator(queue, converter, poll_interval=0.05).prove_spec(foo_spec)
+        assert sorted(store) == ["Foo.Answer", "Foo.Question"]
+
+        foo = converter.convert_spec(foo_spec, store=store)
+        assert foo == AsnTypeConverter(skip_proof=False).convert_spec(foo_spec)
+        assert not converter.unproven
+    finally:
+        stop_workers(queue, workers)
+    assert not any(queue.pending.iterdir())
+    assert not any(queue.done.iterdir())
+
+
+def test_coordinator_proves_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    log = tmp_path / "proofs"
+    unproven_message_proven = UnprovenMessage.proven
+
+    def proven(self: UnprovenMessage, skip_proof: bool = False) -> Message:
+        if not skip_proof:
+            with log.open("a") as f:
+                f.write(f"{self.identifier}\n")
+        return unproven_message_proven(self, skip_proof)
+
+    monkeypatch.setattr(UnprovenMessage, "proven", proven)
+    # A `Session` also proves the prelude, once.
+    Session(AsnTypeConverter(skip_proof=False)).convert_text(DEP_ASN)
+    expected = Counter(log.read_text().split())
+    log.unlink()
+
+    queue = JobQueue(tmp_path / "queue")
+    workers = start_workers(queue, 2)
+    try:
+        converter = AsnTypeConverter(skip_proof=False)
+        session = Session(converter, Coordinator(queue, converter, poll_interval=0.05))
+        session.convert_text(DEP_ASN)
+    finally:
+        stop_workers(queue, workers)
+    # The `INTEGER` of `Inner` is not proven again by the job of `Outer`.
+    assert Counter(log.read_text().split()) == expected
+
+
+def test_coordinator_timeout(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def verify(self: Message) -> None:
+        # The prelude messages are verified again whenever they are merged.
+        if not str(self.identifier).startswith(prelude.PRELUDE_NAME):
+            time.sleep(3600)
+
+    monkeypatch.setattr(Message, "verify", verify)
+    queue = JobQueue(tmp_path / "queue")
+    workers = start_workers(queue, 2)
+    try:
+        converter = AsnTypeConverter(skip_proof=False, proof_timeout=0.5)
+        session = Session(converter, Coordinator(queue, converter, poll_interval=0.05))
+        dep = session.convert_text(DEP_ASN)
+        assert [str(ident) for ident in dep] == ["Dep::Inner", "Dep::Outer"]
+        # `Outer` is not submitted, since it depends on the unproven `Inner`.
+        assert converter.unproven == {"Dep.Inner", "Dep.Outer"}
+    finally:
+        stop_workers(queue, workers)
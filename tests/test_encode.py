@@ -0,0 +1,84 @@
+import random
+from typing import Any
+
+import asn1tools as asn1
+import pytest
+from asn2rflx import prelude
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.corpus import AsnValueGenerator, is_short_form
+from asn2rflx.encode import BerEncoder
+from asn2rflx.error import Asn2RflxError
+from asn2rflx.utils import from_asn1_name
+from frozendict import frozendict
+
+ASSETS = "assets/"
+
+
+def converted_value(value: Any) -> Any:
+    """Renames the fields of an `asn1tools` value as in the converted types."""
+    if isinstance(value, dict):
+        return {from_asn1_name(k): converted_value(v) for k, v in value.items()}
+    if isinstance(value, tuple) and isinstance(value[0], str):
+        return (from_asn1_name(value[0]), converted_value(value[1]))
+    if isinstance(value, list):
+        return [converted_value(v) for v in value]
+    return value
+
+
+@pytest.mark.parametrize(
+    "files",
+    [
+        ["foo.asn"],
+        ["rocket_mod.asn"],
+        ["tagged.asn"],
+        ["rfc1155.asn", "rfc1157.asn"],
+    ],
+)
+def test_encode(files: list[str]) -> None:
+    spec = asn1.compile_files([ASSETS + f for f in files])
+    graph = AsnTypeConverter().convert_ber_spec(spec)
+    gen = AsnValueGenerator(random.Random(0))
+    for module, tys in spec.modules.items():
+        for name, ty in tys.items():
+            encoder = BerEncoder(graph[f"{module}.{name}"])
+            for _ in range(50):
+                value = gen.generate(ty.type)
+                expected = ty.encode(value)
+                if is_short_form(expected):
+                    assert encoder.encode(converted_value(value)) == expected
+                else:
+                    with pytest.raises(Asn2RflxError):
+                        encoder.encode(converted_value(value))
+
+
+def test_encode_batch() -> None:
+    spec = asn1.compile_files(ASSETS + "rocket_mod.asn")
+    encoder = BerEncoder(
+        AsnTypeConverter().convert_ber_spec(spec)["World-Schema.Rocket"]
+    )
+    values = [
+        {"range": i, "name": b"x" * i, "ident": "1.2.3", "payload": ("one", -i)}
+        for i in range(10)
+    ]
+
+    buf, ends = encoder.encode_batch(values)
+    assert ends[-1] == len(buf)
+    assert bytes(buf) == b"".join(spec.encode("Rocket", v) for v in values)
+
+    # Invalid values leave the buffer unchanged.
+    with pytest.raises(Asn2RflxError, match="cannot encode"):
+        encoder.encode_into(buf, {"range": 0})
+    assert ends[-1] == len(buf)
+
+
+def test_encode_explicit_name() -> None:
+    # Only the wrappers of `BerType.explicitly_tagged` are encoded as explicit tags,
+    # not the `SEQUENCE`s looking like them.
+    ty = prelude.SequenceBerType(
+        "Names", "Explicit_INTEGER", frozendict({"Inner": prelude.INTEGER})
+    )
+    assert BerEncoder(ty).encode({"Inner": 2}) == b"\x30\x03\x02\x01\x02"
+    explicit = prelude.INTEGER.explicitly_tagged(
+        prelude.AsnTag.from_bytearray(bytearray(b"\xa0")), "Names"
+    )
+    assert BerEncoder(explicit).encode(2) == b"\xa0\x03\x02\x01\x02"
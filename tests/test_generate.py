@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+from asn2rflx.generate import DEFAULT_PREFIX, generate, generate_package, packages
+from asn2rflx.session import Session
+from rflx.generator import Generator
+from rflx.identifier import ID
+from rflx.integration import Integration
+from rflx.model import Model
+
+ASSETS = "assets/"
+
+
+def test_generate(tmp_path: Path) -> None:
+    session = Session()
+    model = Model(
+        types=[
+            *session.prelude.types,
+            *session.convert_files([ASSETS + "foo.asn"]).values(),
+        ]
+    )
+
+    (got := tmp_path / "got").mkdir()
+    timings = generate(model, got, jobs=2)
+    assert [str(pkg) for pkg in timings] == ["Prelude", "Foo"]
+
+    # The result should be the same as generating the whole model at once.
+    (expected := tmp_path / "expected").mkdir()
+    Generator(DEFAULT_PREFIX).generate(model, Integration(), expected)
+    assert sorted(f.name for f in got.iterdir()) == sorted(
+        f.name for f in expected.iterdir()
+    )
+    for f in expected.iterdir():
+        assert (got / f.name).read_text() == f.read_text()
+
+
+def test_generate_package(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    session = Session()
+    model = session.assemble(session.convert_files([ASSETS + "foo.asn"]).values())
+
+    generated: list[ID] = []
+    generate_units = Generator._generate
+
+    def record(self: Generator, model: Model, integration: Integration) -> dict:
+        generated.extend(t.identifier for t in model.types)
+        return generate_units(self, model, integration)
+
+    # The dependencies of the package (e.g. `Prelude`) are not generated again.
+    monkeypatch.setattr(Generator, "_generate", record)
+    generate_package(ID("Foo"), packages(model.types)[ID("Foo")], tmp_path, "RFLX")
+    assert [str(ident) for ident in generated] == ["Foo::Question", "Foo::Answer"]
+    assert sorted(f.name for f in tmp_path.iterdir()) == [
+        "rflx-foo-answer.adb",
+        "rflx-foo-answer.ads",
+        "rflx-foo-question.adb",
+        "rflx-foo-question.ads",
+        "rflx-foo.ads",
+    ]
@@ -0,0 +1,57 @@
+import os
+import stat
+from pathlib import Path
+
+from asn2rflx.output import write_if_changed, write_specification_files
+from asn2rflx.session import Session
+from rflx.model import Model
+
+ASSETS = "assets/"
+
+
+def test_write_if_changed(tmp_path: Path) -> None:
+    path = tmp_path / "foo.rflx"
+    assert write_if_changed(path, "foo")
+    mtime = path.stat().st_mtime_ns
+    assert not write_if_changed(path, "foo")
+    assert path.stat().st_mtime_ns == mtime
+    assert write_if_changed(path, b"bar")
+    assert path.read_text() == "bar"
+    assert [f.name for f in tmp_path.iterdir()] == ["foo.rflx"]
+
+
+def test_write_if_changed_mode(tmp_path: Path) -> None:
+    path = tmp_path / "foo.rflx"
+    # New files get the permissions allowed by the current umask.
+    umask = os.umask(0o027)
+    try:
+        assert write_if_changed(path, "foo")
+        assert os.umask(0o027) == 0o027
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+    # The permissions of replaced files are kept.
+    path.chmod(0o640)
+    assert write_if_changed(path, "bar")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_write_specification_files(tmp_path: Path) -> None:
+    session = Session()
+    types = [
+        *session.prelude.types,
+        *session.convert_files([ASSETS + "foo.asn", ASSETS + "tagged.asn"]).values(),
+    ]
+
+    written = write_specification_files(Model(types=types), tmp_path)
+    assert sorted(f.name for f in written) == [
+        "foo.rflx",
+        "prelude.rflx",
+        "tagged_test.rflx",
+    ]
+    contents = {f: f.read_text() for f in written}
+
+    # The output does not depend on the order of the types.
+    assert not write_specification_files(Model(types=types[::-1]), tmp_path)
+    assert {f: f.read_text() for f in written} == contents
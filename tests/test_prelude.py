@@ -1,7 +1,45 @@
+import asn1tools as asn1
+import pytest
 from asn2rflx import prelude
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.error import Asn2RflxError
+
+ASSETS = "assets/"
 
 
 def test_asn_tag_bytearray() -> None:
     for byte in range(2**8):
         arr = bytearray([byte])
         assert prelude.AsnTag.from_bytearray(arr).as_bytearray == arr
+
+
+def test_snmpv1_roots() -> None:
+    snmpv1_spec = asn1.compile_files(
+        [
+            ASSETS + "rfc1155.asn",
+            ASSETS + "rfc1157.asn",
+        ]
+    )
+    converter = AsnTypeConverter(skip_proof=True)
+    cache = prelude.TypeCache()
+    snmpv1 = converter.convert_spec(snmpv1_spec, roots=["Message"], cache=cache)
+    assert [str(ident) for ident in snmpv1] == [
+        "RFC1157_SNMP::Message",
+        "RFC1157_SNMP::VarBind",
+        "RFC1157_SNMP::SEQUENCE_OF_VarBind",
+    ]
+
+    # Types that cannot be reached from `Message`, e.g. those from `RFC1155-SMI`,
+    # should not be materialized at all.
+    materialized = {str(key[0].full_ident) for key in cache.types}
+    assert "RFC1157_SNMP::Message" in materialized
+    assert not [ident for ident in materialized if ident.startswith("RFC1155_SMI::")]
+    assert not materialized & {
+        "RFC1157_SNMP::PDUs",
+        "RFC1157_SNMP::PDU",
+        "RFC1157_SNMP::Ctxt00_GetRequest_PDU",
+        "RFC1157_SNMP::Ctxt04_Trap_PDU",
+    }
+
+    with pytest.raises(Asn2RflxError):
+        converter.convert_spec(snmpv1_spec, roots=["Unknown"])
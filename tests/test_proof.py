@@ -0,0 +1,105 @@
+import logging
+import time
+
+import asn1tools as asn1
+import pytest
+from asn2rflx import prelude
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.error import ProofTimeoutError
+from asn2rflx.proof import ProofFallback, Progress, prove
+from rflx.model import Message, UnprovenMessage
+
+ASSETS = "assets/"
+
+PAIR_ASN = "Pair DEFINITIONS ::= BEGIN Pair ::= SEQUENCE { a INTEGER, b INTEGER } END"
+
+
+@pytest.fixture
+def endless_proofs(monkeypatch: pytest.MonkeyPatch) -> None:
+    def verify(self: Message) -> None:
+        # The prelude messages are verified again whenever they are merged.
+        if not str(self.identifier).startswith(prelude.PRELUDE_NAME):
+            time.sleep(3600)
+
+    monkeypatch.setattr(Message, "verify", verify)
+
+
+def test_proof_timeout_skip(endless_proofs: None) -> None:
+    foo_spec = asn1.compile_files(ASSETS + "foo.asn")
+    converter = AsnTypeConverter(skip_proof=False, proof_timeout=0.5)
+    foo = converter.convert_spec(foo_spec)
+
+    assert [str(ident) for ident in foo] == ["Foo::Question", "Foo::Answer"]
+    assert converter.unproven == {"Foo.Question", "Foo.Answer"}
+
+
+def test_proof_timeout_fail(endless_proofs: None) -> None:
+    foo_spec = asn1.compile_files(ASSETS + "foo.asn")
+    converter = AsnTypeConverter(
+        skip_proof=False, proof_timeout=0.5, on_proof_timeout=ProofFallback.FAIL
+    )
+    with pytest.raises(ProofTimeoutError):
+        converter.convert_spec(foo_spec)
+
+
+def test_prove_reuses_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    spec = asn1.compile_string(PAIR_ASN)
+    pair = AsnTypeConverter().convert_ber_spec(spec)["Pair.Pair"]
+    cache = prelude.TypeCache()
+    prove(prelude.INTEGER, cache=cache)
+
+    def proven(self: UnprovenMessage, skip_proof: bool = False) -> Message:
+        assert skip_proof or not str(self.identifier).startswith(prelude.PRELUDE_NAME)
+        return unproven_message_proven(self, skip_proof)
+
+    # The proof process reuses the proven dependencies.
+    unproven_message_proven = UnprovenMessage.proven
+    monkeypatch.setattr(UnprovenMessage, "proven", proven)
+    res = prove(pair, timeout=600, cache=cache)
+    assert res == pair.tlv_ty(skip_proof=True)
+    assert cache.types[(pair, "tlv_ty", False)] is res
+
+    # The types proven elsewhere are not proven again.
+    assert prove(pair, cache=prelude.TypeCache(proven={prelude.INTEGER})) == res
+
+
+@pytest.mark.xdist_group(name="foo")
+def test_proof_timeout_success() -> None:
+    foo_spec = asn1.compile_files(ASSETS + "foo.asn")
+    converter = AsnTypeConverter(skip_proof=False, proof_timeout=600)
+    foo = converter.convert_spec(foo_spec)
+
+    assert foo == AsnTypeConverter(skip_proof=False).convert_spec(foo_spec)
+    assert not converter.unproven
+
+
+def test_converter_reuses_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    spec = asn1.compile_string(PAIR_ASN)
+    converter = AsnTypeConverter(skip_proof=False)
+    pair = converter.convert_spec(spec)
+
+    def proven(self: UnprovenMessage, skip_proof: bool = False) -> Message:
+        assert skip_proof, f"`{self.identifier}` proven again"
+        return unproven_message_proven(self, skip_proof)
+
+    # The types are proven once per converter, even without a `TypeCache`.
+    unproven_message_proven = UnprovenMessage.proven
+    monkeypatch.setattr(UnprovenMessage, "proven", proven)
+    [(ident, ty)] = pair.items()
+    assert converter.convert_spec(spec)[ident] is ty
+
+
+def test_progress(caplog: pytest.LogCaptureFixture) -> None:
+    progress = Progress(2)
+    progress.advance("Foo")
+    progress.advance("Bar")
+    assert progress.done == progress.total
+
+    # The progress is only logged when the types are proven.
+    caplog.set_level(logging.INFO)
+    caplog.clear()
+    spec = asn1.compile_string(PAIR_ASN)
+    AsnTypeConverter(skip_proof=True).convert_spec(spec)
+    assert not caplog.messages
+    AsnTypeConverter(skip_proof=False).convert_spec(spec)
+    assert [m.split()[0] for m in caplog.messages] == ["[1/1]"]
@@ -0,0 +1,109 @@
+import os
+import shutil
+from pathlib import Path
+
+import asn1tools as asn1
+import pytest
+from asn2rflx import prelude
+from asn2rflx.convert import AsnTypeConverter
+from asn2rflx.session import Session, parallel_compile_files
+from rflx.model import Message, UnprovenMessage
+
+ASSETS = "assets/"
+
+
+def test_session_convert_text() -> None:
+    session = Session()
+    text = Path(ASSETS + "foo.asn").read_text()
+
+    foo = session.convert_text(text, roots=["Question"])
+    assert [str(ident) for ident in foo] == ["Foo::Question"]
+    assert session.compile_text(text) is session.compile_text(text)
+
+    # Types materialized by previous conversions are reused.
+    foo1 = session.convert_text(text)
+    assert [str(ident) for ident in foo1] == ["Foo::Question", "Foo::Answer"]
+    assert foo1[next(iter(foo))] is next(iter(foo.values()))
+
+    spec = session.compile_text(text)
+    session.invalidate("Foo")
+    assert session.compile_text(text) is not spec
+
+
+def test_session_convert_files(tmp_path: Path) -> None:
+    session = Session()
+    path = tmp_path / "foo.asn"
+    shutil.copy(ASSETS + "foo.asn", path)
+
+    spec = session.compile_files([str(path)])
+    assert session.compile_files([str(path)]) is spec
+
+    # Changed files are compiled again.
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert session.compile_files([str(path)]) is not spec
+
+    assert [str(ident) for ident in session.convert_files([str(path)])] == [
+        "Foo::Question",
+        "Foo::Answer",
+    ]
+
+
+def test_session_isolation() -> None:
+    session, session1 = Session(), Session()
+    text = Path(ASSETS + "foo.asn").read_text()
+    assert session.compile_text(text) is not session1.compile_text(text)
+    assert session.prelude is session.prelude
+    assert session.prelude is not session1.prelude
+
+    [question] = session.convert_text(text, roots=["Question"]).values()
+    [question1] = session1.convert_text(text, roots=["Question"]).values()
+    assert question == question1 and question is not question1
+
+
+def test_session_invalidate() -> None:
+    session = Session()
+    text = Path(ASSETS + "foo.asn").read_text()
+    foo = session.convert_text(text)
+    session.converter.unproven.update(["Foo.Question", "Bar.Question"])
+
+    session.invalidate("Foo")
+    assert session.converter.unproven == {"Bar.Question"}
+    # The materialized types have been released.
+    foo1 = session.convert_text(text)
+    assert foo1 == foo
+    assert not any(ty is ty1 for ty, ty1 in zip(foo.values(), foo1.values()))
+
+
+def test_session_proves_prelude_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    proofs: list[str] = []
+
+    def proven(self: UnprovenMessage, skip_proof: bool = False) -> Message:
+        if not skip_proof:
+            proofs.append(str(self.identifier))
+        return unproven_message_proven(self, skip_proof)
+
+    unproven_message_proven = UnprovenMessage.proven
+    monkeypatch.setattr(UnprovenMessage, "proven", proven)
+    session = Session(AsnTypeConverter(skip_proof=False))
+    session.convert_text("A DEFINITIONS ::= BEGIN A ::= SEQUENCE { a INTEGER } END")
+    session.convert_text("B DEFINITIONS ::= BEGIN B ::= SEQUENCE { b INTEGER } END")
+    assert session.prelude
+
+    prelude_proofs = [p for p in proofs if p.startswith(prelude.PRELUDE_NAME)]
+    assert "Prelude::INTEGER" in prelude_proofs
+    assert len(prelude_proofs) == len(set(prelude_proofs))
+
+
+def test_parallel_compile_files() -> None:
+    # `RFC1157-SNMP` imports types from `RFC1155-SMI`.
+    files = [ASSETS + "rfc1155.asn", ASSETS + "rfc1157.asn"]
+    spec = parallel_compile_files(files, jobs=2)
+    expected = asn1.compile_files(files)
+
+    assert spec.modules.keys() == expected.modules.keys()
+    converter = AsnTypeConverter()
+    assert converter.convert_ber_spec(spec) == converter.convert_ber_spec(expected)
+    assert Session(jobs=2).convert_files(files).keys() == (
+        Session(jobs=1).convert_files(files).keys()
+    )
@@ -0,0 +1,185 @@
+import asyncio
+import random
+import sys
+from pathlib import Path
+from typing import Iterator, Optional
+
+import asn1tools as asn1
+import pytest
+from asn2rflx.corpus import AsnValueGenerator
+from asn2rflx.error import Asn2RflxError
+from asn2rflx.stream import StreamValidator, pyrflx_validator, read_tlv
+
+ASSETS = "assets/"
+
+CLIENTS = 1000
+"""The number of concurrent connections of `test_stream_validator`."""
+
+
+def stream_of(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def rocket_messages(count: int) -> tuple[asn1.compiler.Specification, list[bytes]]:
+    spec = asn1.compile_files(ASSETS + "rocket_mod.asn")
+    ty = spec.modules["World-Schema"]["Rocket"]
+    gen = AsnValueGenerator(random.Random(0))
+    return spec, [bytes(next(gen.messages(ty))) for _ in range(count)]
+
+
+def test_read_tlv() -> None:
+    async def read_all(data: bytes) -> list[bytes]:
+        reader = stream_of(data)
+        res = []
+        while (tlv := await read_tlv(reader)) is not None:
+            res.append(tlv)
+        return res
+
+    assert asyncio.run(read_all(b"")) == []
+    assert asyncio.run(read_all(b"\x02\x01\x00\x05\x00")) == [
+        b"\x02\x01\x00",
+        b"\x05\x00",
+    ]
+    with pytest.raises(Asn2RflxError, match="truncated TLV header"):
+        asyncio.run(read_all(b"\x05\x00\x02"))
+    with pytest.raises(Asn2RflxError, match="truncated TLV at end"):
+        asyncio.run(read_all(b"\x02\x02\x00"))
+    with pytest.raises(Asn2RflxError, match="long length"):
+        asyncio.run(read_all(b"\x04\x81\x80"))
+
+
+def test_backpressure() -> None:
+    async def run() -> int:
+        async with StreamValidator(lambda _: None, workers=0, max_pending=2) as v:
+            # Nothing is consumed, so the connection stops being read.
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(v.handle(stream_of(b"\x05\x00" * 10)), 0.1)
+            pending = v._queue.qsize()
+            while not v._queue.empty():
+                v._queue.get_nowait()
+                v._queue.task_done()
+            return pending
+
+    assert asyncio.run(run()) == 2
+
+
+async def serve(
+    validator: StreamValidator,
+    messages: list[bytes],
+    clients: int,
+    path: Optional[Path] = None,
+) -> None:
+    # All the clients connect at once.
+    if path:
+        server = await asyncio.start_unix_server(
+            validator.handle, path, backlog=clients
+        )
+    else:
+        server = await asyncio.start_server(
+            validator.handle, "127.0.0.1", 0, backlog=clients
+        )
+    port = server.sockets[0].getsockname()[1]
+
+    async def client(i: int) -> None:
+        if path:
+            _, writer = await asyncio.open_unix_connection(path)
+        else:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        data = b"".join(messages[i:] + messages[:i])
+        # Send the messages in pieces that don't match the TLV boundaries.
+        for start in range(0, len(data), 7):
+            writer.write(data[start : start + 7])
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    async with server:
+        await asyncio.gather(*(client(i) for i in range(clients)))
+        while validator.stats.connections < clients or validator.stats.active:
+            await asyncio.sleep(0.01)
+        await validator.join()
+
+
+@pytest.fixture
+def open_files() -> Iterator[None]:
+    """Allows the thousands of sockets of `test_stream_validator` to be open."""
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = 4 * CLIENTS
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        if hard != resource.RLIM_INFINITY and hard < needed:
+            pytest.skip(f"at least {needed} open files are needed")
+        resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+    yield
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+@pytest.mark.parametrize("unix", [False, True])
+def test_stream_validator(unix: bool, tmp_path: Path, open_files: None) -> None:
+    if unix and sys.platform == "win32":
+        pytest.skip("Unix sockets are not available")
+    spec, messages = rocket_messages(20)
+    # Corrupt the last message, so that it fails validation.
+    messages[-1] = messages[-1][:-3] + b"\x05\x00\x00"
+    rejected: list[bytes] = []
+
+    async def run() -> StreamValidator:
+        async with StreamValidator(
+            lambda data: spec.decode("Rocket", data),
+            on_invalid=lambda data, _: rejected.append(data),
+        ) as validator:
+            path = tmp_path / "sock" if unix else None
+            await serve(validator, messages, clients=CLIENTS, path=path)
+            return validator
+
+    stats = asyncio.run(run()).stats
+    assert stats.connections == CLIENTS
+    assert stats.messages == CLIENTS * 20
+    assert stats.invalid == CLIENTS
+    assert stats.framing_errors == 0
+    assert set(rejected) == {messages[-1]}
+
+
+def test_stream_validator_framing_error() -> None:
+    async def run() -> StreamValidator:
+        async with StreamValidator(lambda _: None) as validator:
+            await validator.handle(stream_of(b"\x05\x00\x1f\x01\x00"))
+            await validator.join()
+            return validator
+
+    stats = asyncio.run(run()).stats
+    assert stats.messages == 1
+    assert stats.framing_errors == 1
+
+
+def test_stream_validator_connection_lost() -> None:
+    async def run() -> StreamValidator:
+        async with StreamValidator(lambda _: None) as validator:
+            reader = asyncio.StreamReader()
+            reader.set_exception(ConnectionResetError())
+            await validator.handle(reader)
+            await validator.join()
+            return validator
+
+    stats = asyncio.run(run()).stats
+    assert stats.connections == stats.lost == 1
+    assert stats.active == stats.framing_errors == 0
+
+
+def test_pyrflx_validator() -> None:
+    pytest.importorskip("rflx.pyrflx")
+    from asn2rflx.session import Session
+    from rflx.model import Model
+
+    session = Session()
+    types = session.convert_files([ASSETS + "foo.asn"])
+    validate = pyrflx_validator(
+        Model(types=[*session.prelude.types, *types.values()]), "Foo::Question"
+    )
+    spec = asn1.compile_files(ASSETS + "foo.asn")
+    validate(spec.encode("Question", {"id": 1, "question": "?"}))
+    with pytest.raises(Exception):
+        validate(b"\x30\x03\x02\x01")